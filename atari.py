@@ -1,17 +1,34 @@
+import time
+
+# Startup is timed from the first import to the first menu frame
+STARTED_AT = time.perf_counter()
+
 import pygame as pg
+import numpy as np
 import sys
 import random
 import math
 import os
+import argparse
+import gc
+import hashlib
+import json
+import queue
+import sqlite3
+import struct
+import threading
+import tracemalloc
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from datetime import date
 from enum import Enum
 
-# Initialize pygame
-pg.init()
-pg.mixer.init()
+# Importing the module initializes nothing: the window, fonts and audio start when a game needs them
 
 # Game settings
 WIDTH, HEIGHT = 800, 600
-FPS = 60
+FPS = 60  # simulation ticks per second
+MAX_RENDER_FPS = 144
 BASE_SPEED = 5
 
 # Colors
@@ -29,6 +46,146 @@ SHOULDER_COLOR = (70, 70, 75)
 ORANGE = (255, 165, 0)
 PURPLE = (128, 0, 128)
 
+# Seeds go into the replay header (unsigned) and the leaderboard (signed 64-bit)
+MAX_SEED = 2 ** 63
+
+# Player input bits (used by scripted policies in headless mode)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+
+# Small least-recently-used cache for pre-rendered surfaces
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        
+    def get(self, key):
+        item = self.items.get(key)
+        if item is not None:
+            self.items.move_to_end(key)
+        return item
+        
+    def put(self, key, item):
+        self.items[key] = item
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+        return item
+        
+    def clear(self):
+        self.items.clear()
+        
+    def __len__(self):
+        return len(self.items)
+
+# Every surface the game creates is counted here, for the memory profiler: SDL allocates
+# their pixels outside tracemalloc's view
+class SurfaceCounter:
+    def __init__(self):
+        self.created = 0
+        self.pixel_bytes = 0
+        
+    def track(self, surface):
+        self.created += 1
+        self.pixel_bytes += surface.get_pitch() * surface.get_height()
+        return surface
+        
+surface_counter = SurfaceCounter()
+
+def new_surface(size, flags=0):
+    return surface_counter.track(pg.Surface(size, flags))
+
+# Bounded cache of rendered text, so strings are only rasterized when they change
+class TextCache:
+    def __init__(self, max_size=256):
+        self.surfaces = LRUCache(max_size)
+        self.composites = LRUCache(32)
+        
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces.put(key, surface_counter.track(font.render(text, antialias, color)))
+        return surface
+        
+    def render_layered(self, font, text, layers):
+        # Multi-layer text such as a shadow or glow under the main color; layers are
+        # (color, (dx, dy)) drawn in order. Returns the surface and its offset from the text position.
+        key = (font, text, tuple(layers))
+        composite = self.composites.get(key)
+        if composite is None:
+            rendered = [(self.render(font, text, color), offset) for color, offset in layers]
+            left = min(dx for _, (dx, _) in layers)
+            top = min(dy for _, (_, dy) in layers)
+            right = max(dx + surface.get_width() for surface, (dx, _) in rendered)
+            bottom = max(dy + surface.get_height() for surface, (_, dy) in rendered)
+            surface = new_surface((right - left, bottom - top), pg.SRCALPHA)
+            for i, (layer, (dx, dy)) in enumerate(rendered):
+                # The first layer is copied as-is so its edges keep their alpha
+                surface.blit(layer, (dx - left, dy - top), special_flags=pg.BLEND_RGBA_MAX if i == 0 else 0)
+            composite = self.composites.put(key, (surface, (left, top)))
+        return composite
+        
+    def clear(self):
+        self.surfaces.clear()
+        self.composites.clear()
+
+text_cache = TextCache()
+# Numeric readouts (FPS line, profiler graph) change every refresh; they get their own small
+# cache so they never evict the HUD and menu text
+readout_cache = TextCache(32)
+
+# Visual quality tiers, best first
+QUALITY_TIERS = [
+    {"name": "high", "particle_stride": 1, "wheel_detail": True, "road_detail": True,
+     "scenery_detail": True, "overlay_pulse": True},
+    {"name": "medium", "particle_stride": 2, "wheel_detail": True, "road_detail": False,
+     "scenery_detail": True, "overlay_pulse": True},
+    {"name": "low", "particle_stride": 3, "wheel_detail": False, "road_detail": False,
+     "scenery_detail": False, "overlay_pulse": True},
+    {"name": "minimal", "particle_stride": 4, "wheel_detail": False, "road_detail": False,
+     "scenery_detail": False, "overlay_pulse": False},
+]
+
+# Steps the quality tier down when the rolling frame work time nears the tick budget and
+# back up once there is headroom again; only affects drawing, never the simulation
+class QualityGovernor:
+    def __init__(self, budget=1.0 / FPS, window=60, step_down_load=0.9, step_up_load=0.5):
+        self.enabled = False
+        self.budget = budget
+        self.samples = deque(maxlen=window)
+        self.step_down_load = step_down_load
+        self.step_up_load = step_up_load
+        self.cooldown = 0
+        self.set_tier(0)
+        
+    def set_tier(self, index):
+        self.index = index
+        self.tier = QUALITY_TIERS[index]
+        self.samples.clear()
+        
+    def record(self, seconds):
+        # seconds: time spent simulating and drawing one frame, excluding the frame cap sleep
+        if not self.enabled:
+            return
+        self.samples.append(seconds)
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+        if len(self.samples) < self.samples.maxlen:
+            return
+        load = sorted(self.samples)[int(0.9 * (len(self.samples) - 1))] / self.budget
+        if load > self.step_down_load and self.index < len(QUALITY_TIERS) - 1:
+            self.set_tier(self.index + 1)
+            # New sprites are rendered on the first frames of a tier, give them time to settle
+            self.cooldown = self.samples.maxlen
+        elif load < self.step_up_load and self.index > 0:
+            self.set_tier(self.index - 1)
+            # Climbing back is slower than backing off, so the tiers do not oscillate
+            self.cooldown = 4 * self.samples.maxlen
+
+quality = QualityGovernor()
+
 # Game states
 class GameState(Enum):
     MENU = 1
@@ -36,77 +193,349 @@ class GameState(Enum):
     PAUSED = 3
     GAME_OVER = 4
 
-# Enhanced particle system for effects
-class Particle:
-    def __init__(self, x, y, color, velocity, lifetime):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.velocity = velocity
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        self.size = random.randint(2, 5)
-        
-    def update(self):
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
-        self.lifetime -= 1
-        return self.lifetime > 0
-        
-    def draw(self, screen):
-        alpha = int(255 * (self.lifetime / self.max_lifetime))
-        color = (*self.color, alpha)
-        temp_surf = pg.Surface((self.size * 2, self.size * 2), pg.SRCALPHA)
-        pg.draw.circle(temp_surf, color, (self.size, self.size), self.size)
-        screen.blit(temp_surf, (self.x - self.size, self.y - self.size))
-
-# Enhanced particle system manager
+# Enhanced particle system: fixed-capacity arrays updated in one vectorized step
 class ParticleSystem:
-    def __init__(self):
-        self.particles = []
+    ALPHA_BUCKETS = 16
+    COLOR_STEP = 10
+    
+    def __init__(self, capacity=8192, rng=random):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.vel = np.zeros((capacity, 2), np.float32)
+        # Free slots hold life 1 and never count down, so only live particles can expire
+        self.life = np.ones(capacity, np.int32)
+        self.max_life = np.ones(capacity, np.int32)
+        self.size = np.zeros(capacity, np.int32)
+        self.color = np.zeros(capacity, np.int32)
+        # 0/1 in the same dtype as life, so the per-tick countdown needs no cast buffer
+        self.alive = np.zeros(capacity, np.int32)
+        self.expired = np.zeros(capacity, bool)
+        self.count = 0
+        
+        # Free list of slots; the top free_top entries are available
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self.free_top = capacity
+        
+        self.random = np.random.default_rng(rng.getrandbits(64))
+        self.palette = {}
+        self.colors = []
+        self.sprites = LRUCache(1024)
+        
+    def color_id(self, color):
+        # Colors are quantized so nearby shades share sprites
+        step = self.COLOR_STEP
+        color = tuple(min(255, round(c / step) * step) for c in color)
+        if color not in self.palette:
+            self.palette[color] = len(self.colors)
+            self.colors.append(color)
+        return self.palette[color]
+        
+    def emit(self, x, y, colors, vel_range_x, vel_range_y, life_range, count):
+        n = min(count, self.free_top)
+        if n <= 0:
+            return
+        slots = self.free[self.free_top - n:self.free_top]
+        self.free_top -= n
+        
+        self.pos[slots] = (x, y)
+        self.vel[slots, 0] = self.random.integers(vel_range_x[0], vel_range_x[1] + 1, n)
+        self.vel[slots, 1] = self.random.integers(vel_range_y[0], vel_range_y[1] + 1, n)
+        life = self.random.integers(life_range[0], life_range[1] + 1, n)
+        self.life[slots] = life
+        self.max_life[slots] = life
+        self.size[slots] = self.random.integers(2, 6, n)
+        self.color[slots] = colors if np.isscalar(colors) else colors[:n]
+        self.alive[slots] = True
+        self.count += n
         
     def add_explosion(self, x, y, color, count=10):
-        for _ in range(count):
-            velocity = (random.randint(-3, 3), random.randint(-3, 3))
-            lifetime = random.randint(20, 40)
-            self.particles.append(Particle(x, y, color, velocity, lifetime))
+        self.emit(x, y, self.color_id(color), (-3, 3), (-3, 3), (20, 40), count)
             
     def add_smoke(self, x, y, count=5):
-        for _ in range(count):
-            velocity = (random.randint(-1, 1), random.randint(-2, 0))
-            lifetime = random.randint(30, 60)
-            color = (random.randint(50, 100), random.randint(50, 100), random.randint(50, 100))
-            self.particles.append(Particle(x, y, color, velocity, lifetime))
+        shades = self.random.integers(50, 101, (count, 3))
+        colors = np.array([self.color_id(shade) for shade in shades.tolist()], np.int32)
+        self.emit(x, y, colors, (-1, 1), (-2, 0), (30, 60), count)
             
     def update(self):
-        self.particles = [p for p in self.particles if p.update()]
-        
-    def draw(self, screen):
-        for particle in self.particles:
-            particle.draw(screen)
+        if self.count == 0:
+            return
+        self.pos += self.vel
+        self.life -= self.alive
+        
+        # Return expired slots to the free list; the test runs in a scratch array
+        expired = self.expired
+        np.less_equal(self.life, 0, out=expired)
+        if expired.any():
+            dead = np.flatnonzero(expired)
+            self.alive[dead] = False
+            self.life[dead] = 1
+            self.vel[dead] = 0
+            self.free[self.free_top:self.free_top + len(dead)] = dead
+            self.free_top += len(dead)
+            self.count -= len(dead)
+            
+    def clear(self):
+        self.alive[:] = False
+        self.life[:] = 1
+        self.vel[:] = 0
+        self.free[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self.free_top = self.capacity
+        self.count = 0
+        
+    def reset(self, rng=random):
+        # New run: empty the pool and reseed, keeping the arrays, palette and sprites
+        self.clear()
+        self.random = np.random.default_rng(rng.getrandbits(64))
+        
+    def sprite(self, key):
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            size, color_id, bucket = key
+            color = self.colors[color_id]
+            alpha = 255 * bucket // self.ALPHA_BUCKETS
+            sprite = new_surface((size * 2, size * 2), pg.SRCALPHA)
+            pg.draw.circle(sprite, (*color, alpha), (size, size), size)
+            self.sprites.put(key, sprite)
+        return sprite
+        
+    def draw(self, screen, alpha=1.0):
+        if self.count == 0:
+            return
+        live = np.flatnonzero(self.alive)[::quality.tier["particle_stride"]]
+        size = self.size[live]
+        buckets = np.clip(self.life[live] * self.ALPHA_BUCKETS // self.max_life[live], 1, self.ALPHA_BUCKETS)
+        
+        # One sprite per distinct (size, color, alpha bucket), then a single batched blit
+        keys = (self.color[live] * 8 + size) * (self.ALPHA_BUCKETS + 1) + buckets
+        unique, inverse = np.unique(keys, return_inverse=True)
+        sprites = []
+        for key in unique.tolist():
+            key, bucket = divmod(key, self.ALPHA_BUCKETS + 1)
+            color_id, particle_size = divmod(key, 8)
+            sprites.append(self.sprite((particle_size, color_id, bucket)))
+            
+        # Velocity is constant, so the position between ticks is a step back along it
+        pos = self.pos[live] if alpha == 1.0 else self.pos[live] + self.vel[live] * (alpha - 1.0)
+        corners = (pos - size[:, None]).astype(np.int32).tolist()
+        screen.blits([(sprites[i], corner) for i, corner in zip(inverse.tolist(), corners)], False)
+
+# Fonts load on first use, so simulation-only games never touch the font module
+fonts = {}
+
+def get_font(size):
+    font = fonts.get(size)
+    if font is None:
+        if not pg.font.get_init():
+            pg.font.init()
+        font = fonts[size] = pg.font.Font(None, size)
+    return font
+
+# Procedural sound effects rendered as NumPy sample buffers and cached on disk by parameter hash
+class SoundSynth:
+    VERSION = 1
+    
+    def __init__(self, rate=44100, cache_dir=os.path.join(".cache", "sounds")):
+        self.rate = rate
+        self.cache_dir = cache_dir
+        
+    def cached(self, name, params, render):
+        # Any change to the parameters, the sample rate or the synth version gives a new file
+        blob = json.dumps([self.VERSION, self.rate, name, params], sort_keys=True).encode()
+        path = os.path.join(self.cache_dir, f"{name}-{hashlib.sha1(blob).hexdigest()[:16]}.npy")
+        try:
+            return np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            pass
+        samples = render(**params)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, samples)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+        return samples
+    
+    def finish(self, wave, peak=0.8):
+        wave = wave * (peak / max(1e-9, np.abs(wave).max()))
+        return (wave * 32767).astype(np.int16)
+    
+    def render_engine(self, pitch, cycles=48):
+        # Whole number of periods, so the buffer loops without a click
+        period = max(2, round(self.rate / (55.0 * pitch)))
+        t = np.arange(period * cycles) / period
+        wave = sum(np.sin(2 * np.pi * k * t) / k for k in range(1, 7))
+        # Half-rate rumble from the firing order
+        wave += 0.6 * np.sin(np.pi * t)
+        return self.finish(np.tanh(1.5 * wave), peak=0.6)
+    
+    def render_crash(self, variant, length=0.6):
+        n = int(self.rate * length)
+        t = np.arange(n) / self.rate
+        noise = np.random.default_rng(variant).uniform(-1.0, 1.0, n)
+        # Box low-pass for a duller, heavier burst
+        width = 12 + 4 * variant
+        smoothed = np.convolve(noise, np.ones(width) / width, mode="same")
+        thump = np.sin(2 * np.pi * (70 - 10 * variant) * t) * np.exp(-t * 18)
+        wave = smoothed * np.exp(-t * 7) * 3 + thump
+        return self.finish(wave, peak=0.9)
+    
+    def render_score(self, notes=(880.0, 1320.0), note_length=0.08):
+        n = int(self.rate * note_length)
+        t = np.arange(n) / self.rate
+        envelope = np.exp(-t * 30)
+        return self.finish(np.concatenate([np.sin(2 * np.pi * f * t) * envelope for f in notes]), peak=0.5)
+    
+    def engine(self, pitch):
+        return self.cached("engine", {"pitch": round(pitch, 3)}, self.render_engine)
+    
+    def crash(self, variant):
+        return self.cached("crash", {"variant": variant}, self.render_crash)
+    
+    def score(self):
+        return self.cached("score", {}, self.render_score)
+
+# Fixed set of mixer channels: a new effect takes a free channel or steals the
+# lowest-priority, oldest voice, so bursts never block or allocate mid-frame
+class ChannelPool:
+    def __init__(self, first, count):
+        self.channels = [pg.mixer.Channel(i) for i in range(first, first + count)]
+        self.priority = [0] * count
+        self.started = [0] * count
+        self.plays = 0
+        
+    def play(self, sound, priority, volume):
+        self.plays += 1
+        victim = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                victim = i
+                break
+            if self.priority[i] <= priority and (victim is None or
+                    (self.priority[i], self.started[i]) < (self.priority[victim], self.started[victim])):
+                victim = i
+        if victim is None:
+            # Every voice outranks this one
+            return False
+        channel = self.channels[victim]
+        channel.set_volume(volume)
+        channel.play(sound)
+        self.priority[victim] = priority
+        self.started[victim] = self.plays
+        return True
 
 # Enhanced sound system
 class SoundManager:
-    def __init__(self):
+    ENGINE_PITCHES = 6
+    CRASH_VARIANTS = 4
+    EFFECT_CHANNELS = 8
+    PRIORITY = {"score": 1, "crash": 2}
+    
+    def __init__(self, enabled=True):
         self.sounds = {}
+        self.engine_sounds = []
+        self.engine_channel = None
+        self.engine_pitch = None
+        self.variant_turn = 0
+        self.pool = None
+        self.music = None
+        self.music_wanted = False
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        self.load_ms = None
+        if enabled:
+            # Opening the audio device, building sounds and scanning for music happen off the main
+            # thread; anything played before then is skipped (sounds) or started on arrival (music)
+            threading.Thread(target=self.load, daemon=True).start()
+        else:
+            self.ready.set()
+    
+    def load(self):
+        start = time.perf_counter()
+        try:
+            pg.mixer.init()
+        except pg.error:
+            # No audio device (e.g. build boxes); the game runs silently
+            self.ready.set()
+            return
         self.load_sounds()
+        music = load_music()
+        with self.lock:
+            self.music = music
+            if music and self.music_wanted:
+                pg.mixer.music.play(-1)
+        self.load_ms = (time.perf_counter() - start) * 1000
+        self.ready.set()
         
     def load_sounds(self):
-        # Create sound effects programmatically if files don't exist
+        # Every buffer is synthesized (or read from the cache) before the first effect plays
+        rate, _, channels = pg.mixer.get_init()
+        synth = SoundSynth(rate)
+        
+        def make(samples):
+            if channels > 1:
+                samples = np.repeat(samples[:, None], channels, axis=1)
+            return pg.sndarray.make_sound(np.ascontiguousarray(samples))
+        
         try:
-            # Engine sound (white noise)
-            self.sounds['engine'] = pg.mixer.Sound(pg.mixer.get_init()[0] // 4)
-            # Crash sound
-            self.sounds['crash'] = pg.mixer.Sound(pg.mixer.get_init()[0] // 8)
-            # Score sound
-            self.sounds['score'] = pg.mixer.Sound(pg.mixer.get_init()[0] // 16)
-        except:
-            self.sounds = {}
+            # Engine loops from idle to full boost (speed_boost 1.0 - 2.0)
+            engine = [make(synth.engine(1.0 + i / (self.ENGINE_PITCHES - 1)))
+                      for i in range(self.ENGINE_PITCHES)]
+            sounds = {
+                "crash": [make(synth.crash(v)) for v in range(self.CRASH_VARIANTS)],
+                "score": [make(synth.score())],
+            }
+        except (pg.error, ValueError) as e:
+            print(f"Error building sounds: {e}")
+            return
+        # Channel 0 is reserved for the engine; effects share the pool
+        pg.mixer.set_num_channels(1 + self.EFFECT_CHANNELS)
+        pg.mixer.set_reserved(1)
+        self.engine_channel = pg.mixer.Channel(0)
+        self.pool = ChannelPool(1, self.EFFECT_CHANNELS)
+        self.engine_sounds = engine
+        self.sounds = sounds
+    
+    def play_music(self):
+        with self.lock:
+            self.music_wanted = True
+            if self.music:
+                pg.mixer.music.play(-1)
+    
+    def fade_music(self, ms):
+        with self.lock:
+            self.music_wanted = False
+            if self.music:
+                pg.mixer.music.fadeout(ms)
+    
+    def stop_music(self):
+        with self.lock:
+            self.music_wanted = False
+            if self.music:
+                pg.mixer.music.stop()
             
     def play(self, sound_name, volume=0.5):
         if sound_name in self.sounds:
-            self.sounds[sound_name].set_volume(volume)
-            self.sounds[sound_name].play()
+            variants = self.sounds[sound_name]
+            self.variant_turn = (self.variant_turn + 1) % len(variants)
+            self.pool.play(variants[self.variant_turn], self.PRIORITY.get(sound_name, 0), volume)
+    
+    def set_engine(self, speed_boost, volume=0.25):
+        # None silences the engine; otherwise pick the loop nearest the boost
+        if not self.engine_sounds:
+            return
+        if speed_boost is None:
+            pitch = None
+        else:
+            pitch = round((min(2.0, max(1.0, speed_boost)) - 1.0) * (self.ENGINE_PITCHES - 1))
+        if pitch == self.engine_pitch:
+            return
+        self.engine_pitch = pitch
+        if pitch is None:
+            self.engine_channel.fadeout(150)
+        else:
+            self.engine_channel.set_volume(volume)
+            self.engine_channel.play(self.engine_sounds[pitch], loops=-1, fade_ms=80)
 
 # Music setup with better error handling
 def load_music():
@@ -131,19 +560,196 @@ def load_music():
         print(f"Error loading music: {e}")
         return None
 
+# Tallest car body, used to size neighbour searches
+MAX_CAR_HEIGHT = 85
+
+# High scores kept in memory; disk writes go through a background thread so a frame never waits on I/O
+class ScoreService:
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY,
+            score INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            seed INTEGER,
+            played_on TEXT NOT NULL,
+            played_at REAL NOT NULL)""",
+        "CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC)",
+        "CREATE INDEX IF NOT EXISTS scores_by_seed ON scores (seed, score DESC)",
+        "CREATE INDEX IF NOT EXISTS scores_by_date ON scores (played_on, score DESC)",
+    ]
+    
+    def __init__(self, path="highscore.txt", db_path="leaderboard.db", keep=1000):
+        # Without paths the service is purely in memory (headless runs)
+        self.path = path
+        self.db_path = db_path
+        self.keep = keep
+        self.high_score = self.load_high_score()
+        self.queue = queue.Queue()
+        self.thread = None
+        if path or db_path:
+            self.thread = threading.Thread(target=self.writer, name="score-writer", daemon=True)
+            self.thread.start()
+            
+    def load_high_score(self):
+        if self.path is None:
+            return 0
+        try:
+            with open(self.path, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+            
+    def submit(self, score, level, seed=None):
+        if score > self.high_score:
+            self.high_score = score
+            if self.path:
+                self.queue.put(("high_score", score))
+        if self.db_path:
+            self.queue.put(("record", (score, level, seed, date.today().isoformat(), time.time())))
+            
+    def compact(self):
+        if self.db_path:
+            self.queue.put(("compact", None))
+            
+    def flush(self):
+        if self.thread:
+            self.queue.join()
+            
+    def close(self):
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+            
+    def writer(self):
+        connection = None
+        if self.db_path:
+            try:
+                connection = sqlite3.connect(self.db_path)
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+                connection.commit()
+                # Compact on startup once the log has grown well past what we keep
+                if connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0] > 2 * self.keep:
+                    self.compact_db(connection)
+            except sqlite3.Error as e:
+                print(f"Leaderboard unavailable: {e}")
+                connection = None
+                
+        while True:
+            job = self.queue.get()
+            try:
+                if job is None:
+                    break
+                kind, data = job
+                if kind == "high_score":
+                    self.write_high_score(data)
+                elif kind == "record" and connection:
+                    connection.execute("INSERT INTO scores (score, level, seed, played_on, played_at) "
+                                       "VALUES (?, ?, ?, ?, ?)", data)
+                    connection.commit()
+                elif kind == "compact" and connection:
+                    self.compact_db(connection)
+            except Exception as e:
+                # One bad item must not stop the writer: later scores still get saved
+                print(f"Error saving scores ({job[0]}): {e}")
+            finally:
+                self.queue.task_done()
+        if connection:
+            connection.close()
+            
+    def write_high_score(self, score):
+        # Write a temporary file and atomically swap it in
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(str(score))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        
+    def compact_db(self, connection):
+        # Keep only the best scores
+        connection.execute("DELETE FROM scores WHERE id NOT IN "
+                           "(SELECT id FROM scores ORDER BY score DESC, id LIMIT ?)", (self.keep,))
+        connection.commit()
+        connection.execute("VACUUM")
+        
+    def query(self, sql, params=()):
+        # Leaderboard reads use their own connection and never touch the frame loop
+        if not self.db_path or not os.path.exists(self.db_path):
+            return []
+        connection = sqlite3.connect(self.db_path)
+        try:
+            return connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            return []
+        finally:
+            connection.close()
+            
+    def top(self, n=10):
+        return self.query("SELECT score, level, seed, played_on FROM scores "
+                          "ORDER BY score DESC, id LIMIT ?", (n,))
+        
+    def top_for_seed(self, seed, n=10):
+        return self.query("SELECT score, level, seed, played_on FROM scores WHERE seed = ? "
+                          "ORDER BY score DESC, id LIMIT ?", (seed, n))
+        
+    def top_for_date(self, day, n=10):
+        return self.query("SELECT score, level, seed, played_on FROM scores WHERE played_on = ? "
+                          "ORDER BY score DESC, id LIMIT ?", (day, n))
+
+# Road layout shared by spawning, traffic AI, collision and rendering: equal-width lanes
+# on a road centered in the window
+class RoadGeometry:
+    def __init__(self, lanes=3, lane_width=150):
+        self.lanes = lanes
+        self.lane_width = lane_width
+        self.width = lanes * lane_width
+        self.left = (WIDTH - self.width) // 2
+        self.right = self.left + self.width
+        
+    def lane_at(self, x):
+        # Lane containing x, clamped to the road
+        return max(0, min(self.lanes - 1, int((x - self.left) // self.lane_width)))
+    
+    def lane_center(self, lane):
+        return self.left + lane * self.lane_width + self.lane_width // 2
+
+DEFAULT_ROAD = RoadGeometry()
+# Stress mode: a 12-lane highway for dense traffic
+STRESS_ROAD = RoadGeometry(lanes=12, lane_width=55)
+
 # Enhanced car class with animations and better physics
 class Car:
-    def __init__(self, x, y, color, player=False):
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = ("rng", "width", "height", "x", "y", "prev_x", "prev_y", "speed", "original_speed",
+                 "color", "player", "window_color", "type", "velocity_x", "velocity_y", "acceleration",
+                 "friction", "max_speed", "tilt", "target_tilt", "brake_lights", "headlights",
+                 "road", "road_left", "road_right", "lane_width", "wheel_rotation", "rect")
+    # Scratch rect for the look-ahead in move(), shared by all cars
+    probe = pg.Rect(0, 0, 0, 0)
+    
+    def __init__(self, x, y, color, player=False, rng=random, road=DEFAULT_ROAD):
+        # Persistent hitbox, updated in place whenever the car moves
+        self.rect = pg.Rect(0, 0, 0, 0)
+        self.reset(x, y, color, player, rng, road)
+        
+    def reset(self, x, y, color, player=False, rng=random, road=DEFAULT_ROAD):
+        # Reinitialize in place, drawing from rng in the same order as a new car
+        self.rng = rng
         self.width = 45
-        self.height = 80 if player else random.choice([75, 80, 85])
+        self.height = 80 if player else rng.choice([75, 80, 85])
         self.x = x
         self.y = y
-        self.speed = BASE_SPEED if player else random.randint(2, 4)
+        # Position at the previous tick, for drawing between ticks
+        self.prev_x = x
+        self.prev_y = y
+        self.speed = BASE_SPEED if player else rng.randint(2, 4)
         self.original_speed = self.speed
         self.color = color
         self.player = player
         self.window_color = CYAN if player else WHITE
-        self.type = "player" if player else random.choice(["sedan", "truck", "suv"])
+        self.type = "player" if player else rng.choice(["sedan", "truck", "suv"])
         
         # Enhanced physics
         self.velocity_x = 0
@@ -158,21 +764,21 @@ class Car:
         self.brake_lights = False
         self.headlights = True
         
-        # Better road boundaries
-        self.road_left = 175
-        self.road_right = WIDTH - 225
-        self.lane_width = (self.road_right - self.road_left) // 3
+        # Road boundaries
+        self.road = road
+        self.road_left = road.left
+        self.road_right = road.right
+        self.lane_width = road.lane_width
         
         # Animation frame for wheels
         self.wheel_rotation = 0
+        self.sync_rect()
         
-    def get_rect(self):
-        return pg.Rect(self.x, self.y, self.width, self.height)
+    def sync_rect(self):
+        self.rect.update(self.x, self.y, self.width, self.height)
         
     def get_lane(self):
-        center_x = self.x + self.width // 2
-        relative_pos = center_x - self.road_left
-        return max(0, min(2, int(relative_pos // self.lane_width)))
+        return self.road.lane_at(self.x + self.width // 2)
         
     def update_physics(self):
         # Apply friction
@@ -188,14 +794,18 @@ class Car:
         
         # Update wheel rotation
         self.wheel_rotation += abs(self.velocity_x) + abs(self.velocity_y)
+        self.sync_rect()
         
-    def draw(self, screen):
-        # Calculate tilted position
-        center_x = self.x + self.width // 2
-        center_y = self.y + self.height // 2
+    def sprite_key(self):
+        # Everything that changes how the car looks, with wheel spokes quantized to phases
+        detail = quality.tier["wheel_detail"]
+        phase = int(self.wheel_rotation // CarSpriteCache.PHASE_STEP) % CarSpriteCache.WHEEL_PHASES if detail else 0
+        return (self.type, self.color, self.window_color, self.height,
+                self.headlights, self.brake_lights, detail, phase)
         
+    def render_sprite(self, phase, detail=True):
         # Create surface for the car
-        car_surface = pg.Surface((self.width + 20, self.height + 20), pg.SRCALPHA)
+        car_surface = new_surface((self.width + 20, self.height + 20), pg.SRCALPHA)
         
         # Draw car body with enhanced details
         car_rect = pg.Rect(10, 10, self.width, self.height)
@@ -226,13 +836,16 @@ class Car:
             wheel_y = car_rect.y + wheel_pos[1]
             
             # Wheel shadow
-            pg.draw.ellipse(car_surface, (0, 0, 0, 100), (wheel_x + 1, wheel_y + 1, 12, 12))
+            if detail:
+                pg.draw.ellipse(car_surface, (0, 0, 0, 100), (wheel_x + 1, wheel_y + 1, 12, 12))
             # Wheel
             pg.draw.ellipse(car_surface, wheel_color, (wheel_x, wheel_y, 12, 12))
             pg.draw.ellipse(car_surface, rim_color, (wheel_x + 2, wheel_y + 2, 8, 8))
+            if not detail:
+                continue
             
-            # Animated spokes
-            spoke_angle = self.wheel_rotation + i * 90
+            # Spokes at this animation phase
+            spoke_angle = phase * CarSpriteCache.PHASE_STEP + i * 90
             spoke_x = wheel_x + 6 + math.cos(math.radians(spoke_angle)) * 2
             spoke_y = wheel_y + 6 + math.sin(math.radians(spoke_angle)) * 2
             pg.draw.circle(car_surface, WHITE, (int(spoke_x), int(spoke_y)), 1)
@@ -246,16 +859,19 @@ class Car:
         if self.brake_lights:
             pg.draw.ellipse(car_surface, RED, (car_rect.x + 3, car_rect.y + self.height - 8, 8, 6))
             pg.draw.ellipse(car_surface, RED, (car_rect.x + self.width - 11, car_rect.y + self.height - 8, 8, 6))
+            
+        return car_surface
         
-        # Rotate surface if tilted
-        if abs(self.tilt) > 0.1:
-            rotated_surface = pg.transform.rotate(car_surface, self.tilt)
-            rotated_rect = rotated_surface.get_rect(center=(center_x, center_y))
-            screen.blit(rotated_surface, rotated_rect)
-        else:
-            screen.blit(car_surface, (self.x - 10, self.y - 10))
+    def draw(self, screen, alpha=1.0):
+        # Calculate tilted position, between the last two ticks
+        center_x = self.prev_x + (self.x - self.prev_x) * alpha + self.width // 2
+        center_y = self.prev_y + (self.y - self.prev_y) * alpha + self.height // 2
         
-    def move(self, direction=None, obstacles=None, player_car=None):
+        # One blit of a cached sprite (rotated variants share the same center)
+        car_surface = car_sprites.get(self)
+        screen.blit(car_surface, car_surface.get_rect(center=(center_x, center_y)))
+        
+    def move(self, direction=None, obstacles=None, player_car=None, lane_index=None):
         if self.player:
             if direction == "left":
                 self.velocity_x = max(-self.max_speed, self.velocity_x - self.acceleration)
@@ -278,37 +894,41 @@ class Car:
             original_y = self.y
             
             # Simple lane changing logic
-            if random.random() < 0.001:  # 0.1% chance per frame
+            if self.rng.random() < 0.001:  # 0.1% chance per frame
                 current_lane = self.get_lane()
-                if current_lane > 0 and random.random() < 0.5:
+                if current_lane > 0 and self.rng.random() < 0.5:
                     self.velocity_x = -1
-                elif current_lane < 2 and random.random() < 0.5:
+                elif current_lane < self.road.lanes - 1 and self.rng.random() < 0.5:
                     self.velocity_x = 1
                     
             # Keep in bounds
             self.x = max(self.road_left, min(self.road_right - self.width, self.x + self.velocity_x))
             
             new_y = self.y + self.speed
-            temp_rect = pg.Rect(self.x, new_y, self.width, self.height)
+            temp_rect = self.probe
+            temp_rect.update(self.x, new_y, self.width, self.height)
             can_move = True
             
             # Collision avoidance
-            if obstacles:
-                for other_car in obstacles:
-                    if other_car != self:
-                        other_rect = other_car.get_rect()
-                        if temp_rect.colliderect(other_rect):
-                            safe_distance = self.height + 20
-                            if new_y + self.height > other_car.y:
-                                self.y = max(original_y, other_car.y - safe_distance)
-                                self.speed = max(1, min(self.speed, other_car.speed - 0.5))
-                                self.brake_lights = True
-                                can_move = False
-                            break
+            other_car = None
+            if lane_index is not None:
+                other_car = lane_index.first_collision(self, temp_rect)
+            elif obstacles:
+                for car in obstacles:
+                    if car != self and temp_rect.colliderect(car.rect):
+                        other_car = car
+                        break
+                        
+            if other_car is not None:
+                safe_distance = self.height + 20
+                if new_y + self.height > other_car.y:
+                    self.y = max(original_y, other_car.y - safe_distance)
+                    self.speed = max(1, min(self.speed, other_car.speed - 0.5))
+                    self.brake_lights = True
+                    can_move = False
             
             if player_car and can_move:
-                player_rect = player_car.get_rect()
-                if temp_rect.colliderect(player_rect):
+                if temp_rect.colliderect(player_car.rect):
                     can_move = False
                     self.brake_lights = True
             
@@ -321,138 +941,850 @@ class Car:
             self.update_physics()
             return self.y > HEIGHT + 50
 
+# Pre-rendered car sprites plus rotated variants at quantized tilt angles
+class CarSpriteCache:
+    WHEEL_PHASES = 8
+    PHASE_STEP = 360 // WHEEL_PHASES
+    TILT_STEP = 0.5
+    
+    def __init__(self, max_sprites=256, max_rotated=256):
+        self.sprites = LRUCache(max_sprites)
+        self.rotated = LRUCache(max_rotated)
+        
+    def get(self, car):
+        key = car.sprite_key()
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites.put(key, car.render_sprite(key[-1], key[-2]))
+            
+        if abs(car.tilt) <= 0.1:
+            return sprite
+        tilt = round(car.tilt / self.TILT_STEP) * self.TILT_STEP
+        if tilt == 0:
+            return sprite
+        rotated = self.rotated.get((key, tilt))
+        if rotated is None:
+            rotated = self.rotated.put((key, tilt), surface_counter.track(pg.transform.rotate(sprite, tilt)))
+        return rotated
+        
+    def clear(self):
+        self.sprites.clear()
+        self.rotated.clear()
+
+car_sprites = CarSpriteCache()
+
+# Free list of retired traffic cars, reset in place instead of reallocated on every spawn
+class CarPool:
+    def __init__(self):
+        self.free = []
+        
+    def acquire(self, x, y, color, rng=random, road=DEFAULT_ROAD):
+        if self.free:
+            car = self.free.pop()
+            car.reset(x, y, color, False, rng, road)
+            return car
+        return Car(x, y, color, rng=rng, road=road)
+    
+    def release(self, car):
+        self.free.append(car)
+
+# Per-lane index of traffic sorted by y, so neighbour lookups avoid scanning every car
+class LaneIndex:
+    def __init__(self, lanes=3):
+        self.cars = [[] for _ in range(lanes)]
+        self.ys = [[] for _ in range(lanes)]
+        self.slots = {}
+        self.order = {}
+        self.counter = 0
+        
+    def clear(self):
+        for lane in range(len(self.cars)):
+            self.cars[lane].clear()
+            self.ys[lane].clear()
+        self.slots.clear()
+        self.order.clear()
+        self.counter = 0
+        
+    def add(self, car):
+        lane = car.get_lane()
+        i = bisect_right(self.ys[lane], car.y)
+        self.ys[lane].insert(i, car.y)
+        self.cars[lane].insert(i, car)
+        self.slots[car] = (lane, car.y)
+        # Insertion order matches the order of Game.obstacles
+        self.order[car] = self.counter
+        self.counter += 1
+        
+    def find(self, car):
+        lane, y = self.slots[car]
+        cars = self.cars[lane]
+        i = bisect_left(self.ys[lane], y)
+        while cars[i] is not car:
+            i += 1
+        return lane, i
+        
+    def remove(self, car):
+        lane, i = self.find(car)
+        del self.ys[lane][i]
+        del self.cars[lane][i]
+        del self.slots[car]
+        del self.order[car]
+        
+    def update(self, car):
+        # Re-slot a car after it moved; cheap when it keeps its lane and order
+        lane, i = self.find(car)
+        new_lane = car.get_lane()
+        ys = self.ys[lane]
+        if (new_lane == lane and (i == 0 or ys[i - 1] <= car.y)
+                and (i == len(ys) - 1 or car.y <= ys[i + 1])):
+            ys[i] = car.y
+        else:
+            del ys[i]
+            del self.cars[lane][i]
+            i = bisect_right(self.ys[new_lane], car.y)
+            self.ys[new_lane].insert(i, car.y)
+            self.cars[new_lane].insert(i, car)
+        self.slots[car] = (new_lane, car.y)
+        
+    def nearby(self, lane, y_min, y_max, reach=1):
+        # Cars in lanes lane-reach..lane+reach with y_min <= y <= y_max
+        found = []
+        for l in range(max(0, lane - reach), min(len(self.cars), lane + reach + 1)):
+            ys = self.ys[l]
+            found.extend(self.cars[l][bisect_left(ys, y_min):bisect_right(ys, y_max)])
+        return found
+        
+    def first_collision(self, car, rect):
+        # Earliest-spawned car overlapping rect, like a scan over Game.obstacles
+        reach = car.width // car.lane_width + 1
+        hit = None
+        for other in self.nearby(car.get_lane(), rect.y - MAX_CAR_HEIGHT, rect.bottom, reach):
+            if other is not car and rect.colliderect(other.rect):
+                if hit is None or self.order[other] < self.order[hit]:
+                    hit = other
+        return hit
+
+# Roadside tree, building or sign
+class Scenery:
+    __slots__ = ("x", "y", "type", "color", "sprite")
+    
+    def __init__(self, x, y, type, color):
+        self.set(x, y, type, color)
+        
+    def set(self, x, y, type, color):
+        self.x = x
+        self.y = y
+        self.type = type
+        self.color = color
+        self.sprite = SCENERY_SPRITES[type, color]
+
+# Scenery is generated in fixed-height chunks of world space, each from the road seed and its
+# index alone, so any stretch of road can be rebuilt without generating what came before it
+SCENERY_CHUNK = 240
+SCENERY_PREFETCH = 120
+BIOMES = ("forest", "city", "countryside")
+TREE_COLORS = [(34, 139, 34), (50, 200, 50), (0, 100, 0), (85, 160, 60)]
+BUILDING_COLORS = [GRAY, (120, 110, 100), (90, 100, 120), (140, 90, 80)]
+SIGN_COLORS = [YELLOW, ORANGE]
+
+# Atlas cell index of every scenery look
+SCENERY_SPRITES = {key: i for i, key in enumerate(
+    [("tree", color) for color in TREE_COLORS] +
+    [("building", color) for color in BUILDING_COLORS] +
+    [("sign", color) for color in SIGN_COLORS])}
+
 # Enhanced Road class with better visuals
 class Road:
-    def __init__(self):
-        self.road_width = 450
-        self.road_x = (WIDTH - self.road_width) // 2
-        self.stripes = []
-        self.scenery_objects = []
-        
-        # Initialize road stripes
-        for i in range(15):
-            self.stripes.append({
-                'y': i * 80 - 200,
-                'width': 50,
-                'height': 30,
-                'speed': BASE_SPEED + 1
-            })
-            
-        # Add scenery objects
-        self.generate_scenery()
-        
-    def generate_scenery(self):
-        # Trees and buildings on the sides
-        for i in range(20):
-            side = random.choice(['left', 'right'])
-            x = random.randint(10, 150) if side == 'left' else random.randint(WIDTH - 150, WIDTH - 10)
-            y = i * 100 - 500
-            obj_type = random.choice(['tree', 'building', 'sign'])
-            self.scenery_objects.append({
-                'x': x,
-                'y': y,
-                'type': obj_type,
-                'color': random.choice([GREEN, GRAY, YELLOW, ORANGE])
-            })
-            
-    def draw(self, screen):
-        # Draw gradient shoulders
+    def __init__(self, rng=random, geometry=DEFAULT_ROAD):
+        self.geometry = geometry
+        self.road_width = geometry.width
+        self.road_x = geometry.left
+        
+        # Roadside strips the scenery may use, clear of the road edge
+        self.shoulders = [(lo, hi) for lo, hi in ((10, self.road_x - 25),
+                                                  (self.road_x + self.road_width + 25, WIDTH - 10))
+                          if hi >= lo]
+        
+        # Resident chunks by index, and evicted objects kept for reuse
+        self.chunks = {}
+        self.spare = []
+        
+        # Road stripes scroll as one repeating pattern
+        self.stripe_height = 30
+        self.stripe_period = 80
+        self.stripe_speed = BASE_SPEED + 1
+        
+        # Cached background layers, built on first draw
+        self.base_layer = None
+        self.road_layers = {}
+        self.edge_layers = None
+        self.atlas = None
+        self.batch = []
+        
+        self.reset(rng)
+    
+    def reset(self, rng=random):
+        # New run on the same road: the cached layers are kept, the scenery is rebuilt from a fresh seed
+        self.rng = rng
+        self.scroll = 0
+        self.seed = rng.getrandbits(32)
+        self.distance = 0
+        for chunk in self.chunks.values():
+            self.spare.extend(chunk)
+        self.chunks.clear()
+        self.first_chunk = 0
+        self.stream()
+    
+    def scenery(self, x, y, type, color):
+        if self.spare:
+            obj = self.spare.pop()
+            obj.set(x, y, type, color)
+            return obj
+        return Scenery(x, y, type, color)
+    
+    def generate_chunk(self, index):
+        # Objects for one chunk, with y in world space growing up the road
+        rng = random.Random(f"{self.seed}/{index}")
+        biome = rng.choice(BIOMES)
+        base = index * SCENERY_CHUNK
+        chunk = []
+        for lo, hi in self.shoulders:
+            if biome == "forest":
+                # Staggered rows of trees filling the shoulder
+                for row in range(0, SCENERY_CHUNK, 24):
+                    x = lo + rng.randint(0, 20)
+                    while x <= hi:
+                        chunk.append(self.scenery(x, base + row + rng.randint(0, 10), "tree",
+                                                  rng.choice(TREE_COLORS)))
+                        x += rng.randint(26, 40)
+            elif biome == "city":
+                # A block of buildings with the odd gap for a cross street
+                columns = max(1, (hi - lo + 10) // 50)
+                step = (hi - lo) / columns
+                for row in range(30, SCENERY_CHUNK, 60):
+                    if rng.random() < 0.15:
+                        continue
+                    for column in range(columns):
+                        x = int(lo + step * (column + 0.5))
+                        chunk.append(self.scenery(x, base + row, "building", rng.choice(BUILDING_COLORS)))
+            else:
+                # Open country: a few trees and signs
+                for _ in range(rng.randint(1, 3)):
+                    obj_type = "sign" if rng.random() < 0.3 else "tree"
+                    colors = SIGN_COLORS if obj_type == "sign" else TREE_COLORS
+                    chunk.append(self.scenery(rng.randint(lo, hi), base + rng.randrange(SCENERY_CHUNK),
+                                              obj_type, rng.choice(colors)))
+        return chunk
+    
+    def stream(self):
+        # Keep resident exactly the chunks overlapping the screen plus the prefetch margin
+        first = (self.distance - SCENERY_PREFETCH) // SCENERY_CHUNK
+        last = (self.distance + HEIGHT + SCENERY_PREFETCH) // SCENERY_CHUNK
+        for index in range(self.first_chunk, first):
+            self.spare.extend(self.chunks.pop(index, ()))
+        for index in range(first, last + 1):
+            if index not in self.chunks:
+                self.chunks[index] = self.generate_chunk(index)
+        self.first_chunk = first
+    
+    def scenery_count(self):
+        return sum(len(chunk) for chunk in self.chunks.values())
+            
+    def build_layers(self):
+        # Static base: gradient shoulders and the road surface
+        self.base_layer = new_surface((WIDTH, HEIGHT))
         for i in range(self.road_x):
             shade = 70 + int(15 * (i / self.road_x))
-            pg.draw.line(screen, (shade, shade, shade + 5), (i, 0), (i, HEIGHT))
+            pg.draw.line(self.base_layer, (shade, shade, shade + 5), (i, 0), (i, HEIGHT))
             
         for i in range(self.road_x, WIDTH):
             shade = 70 + int(15 * ((WIDTH - i) / (WIDTH - self.road_x)))
-            pg.draw.line(screen, (shade, shade, shade + 5), (i, 0), (i, HEIGHT))
-        
-        # Road surface with texture
-        pg.draw.rect(screen, ROAD_COLOR, (self.road_x, 0, self.road_width, HEIGHT))
-        
-        # Add road texture
-        for i in range(0, HEIGHT, 20):
-            noise_color = (ROAD_COLOR[0] + random.randint(-5, 5), 
-                          ROAD_COLOR[1] + random.randint(-5, 5), 
-                          ROAD_COLOR[2] + random.randint(-5, 5))
-            pg.draw.line(screen, noise_color, (self.road_x, i), (self.road_x + self.road_width, i))
-        
-        # Draw scenery
-        for obj in self.scenery_objects:
-            if obj['y'] > -50 and obj['y'] < HEIGHT + 50:
-                if obj['type'] == 'tree':
-                    pg.draw.circle(screen, obj['color'], (int(obj['x']), int(obj['y'])), 15)
-                    pg.draw.rect(screen, (101, 67, 33), (obj['x'] - 3, obj['y'], 6, 20))
-                elif obj['type'] == 'building':
-                    pg.draw.rect(screen, obj['color'], (obj['x'] - 20, obj['y'] - 30, 40, 50))
+            pg.draw.line(self.base_layer, (shade, shade, shade + 5), (i, 0), (i, HEIGHT))
+        
+        pg.draw.rect(self.base_layer, ROAD_COLOR, (self.road_x, 0, self.road_width, HEIGHT))
+        
+            
+        # Road edges with reflectors, drawn over the scenery
+        self.edge_layers = []
+        for edge_x, reflector_x in ((self.road_x, self.road_x - 5),
+                                    (self.road_x + self.road_width, self.road_x + self.road_width + 5)):
+            layer = new_surface((20, HEIGHT), pg.SRCALPHA)
+            left = edge_x - 10
+            pg.draw.line(layer, WHITE, (edge_x - left, 0), (edge_x - left, HEIGHT), 4)
+            for i in range(0, HEIGHT, 40):
+                pg.draw.circle(layer, YELLOW, (reflector_x - left, i), 3)
+            self.edge_layers.append((layer, (left, 0)))
+        self.build_atlas()
+            
+    def build_atlas(self):
+        # Every scenery look pre-rasterized once, with and without lit windows. Each cell is
+        # stored as (area in the atlas, offset from the object's anchor point).
+        sizes = {"tree": (30, 35), "building": (40, 50), "sign": (30, 25)}
+        offsets = {"tree": (-15, -15), "building": (-20, -30), "sign": (-15, -10)}
+        width = sum(sizes[kind][0] for kind, _ in SCENERY_SPRITES)
+        self.atlas = new_surface((width, 100), pg.SRCALPHA)
+        self.atlas_cells = ([None] * len(SCENERY_SPRITES), [None] * len(SCENERY_SPRITES))
+        x = 0
+        for (kind, color), index in SCENERY_SPRITES.items():
+            w, h = sizes[kind]
+            dx, dy = offsets[kind]
+            for windows, top in ((False, 0), (True, 50)):
+                cell = self.atlas.subsurface((x, top, w, h))
+                if kind == 'tree':
+                    pg.draw.circle(cell, color, (15, 15), 15)
+                    pg.draw.rect(cell, (101, 67, 33), (12, 15, 6, 20))
+                elif kind == 'building':
+                    cell.fill(color)
                     # Windows
-                    for row in range(3):
+                    for row in range(3 if windows else 0):
                         for col in range(2):
-                            pg.draw.rect(screen, YELLOW, (obj['x'] - 15 + col * 15, obj['y'] - 25 + row * 15, 8, 8))
-                elif obj['type'] == 'sign':
-                    pg.draw.rect(screen, obj['color'], (obj['x'] - 15, obj['y'] - 10, 30, 20))
-                    pg.draw.rect(screen, BLACK, (obj['x'] - 2, obj['y'], 4, 15))
-        
-        # Enhanced lane dividers
-        lane_width = self.road_width // 3
-        for lane in range(1, 3):
-            lane_x = self.road_x + lane * lane_width
-            for stripe in self.stripes:
-                if stripe['y'] > -50 and stripe['y'] < HEIGHT:
-                    # Main stripe
-                    pg.draw.rect(screen, WHITE, (lane_x - 25, stripe['y'], 50, stripe['height']))
-                    # Glow effect
-                    pg.draw.rect(screen, (255, 255, 255, 100), (lane_x - 27, stripe['y'] - 2, 54, stripe['height'] + 4))
-        
-        # Road edges with reflectors
-        pg.draw.line(screen, WHITE, (self.road_x, 0), (self.road_x, HEIGHT), 4)
-        pg.draw.line(screen, WHITE, (self.road_x + self.road_width, 0), (self.road_x + self.road_width, HEIGHT), 4)
-        
-        # Reflectors
-        for i in range(0, HEIGHT, 40):
-            pg.draw.circle(screen, YELLOW, (self.road_x - 5, i), 3)
-            pg.draw.circle(screen, YELLOW, (self.road_x + self.road_width + 5, i), 3)
+                            pg.draw.rect(cell, YELLOW, (5 + col * 15, 5 + row * 15, 8, 8))
+                else:
+                    pg.draw.rect(cell, color, (0, 0, 30, 20))
+                    pg.draw.rect(cell, BLACK, (13, 10, 4, 15))
+                self.atlas_cells[windows][index] = (pg.Rect(x, top, w, h), dx, dy)
+            x += w
+            
+    def road_layer(self, detail):
+        # Scrolling tile: road texture and lane dividers, one stripe period taller than the screen.
+        # Reduced quality tiers get a flat tile without the texture noise and stripe glow.
+        layer = self.road_layers.get(detail)
+        if layer is not None:
+            return layer
+        layer = self.road_layers[detail] = new_surface((self.road_width, HEIGHT + self.stripe_period))
+        layer.fill(ROAD_COLOR)
+        if detail:
+            noise = random.Random(0)
+            for i in range(0, layer.get_height(), 20):
+                noise_color = (ROAD_COLOR[0] + noise.randint(-5, 5), 
+                              ROAD_COLOR[1] + noise.randint(-5, 5), 
+                              ROAD_COLOR[2] + noise.randint(-5, 5))
+                pg.draw.line(layer, noise_color, (0, i), (self.road_width, i))
+        
+        # Dividers narrow with the lanes so they never cover a car's path
+        lane_width = self.geometry.lane_width
+        half = min(25, lane_width // 6)
+        for lane in range(1, self.geometry.lanes):
+            lane_x = lane * lane_width
+            for y in range(0, HEIGHT + self.stripe_period, self.stripe_period):
+                # Glow effect
+                if detail:
+                    pg.draw.rect(layer, WHITE, (lane_x - half - 2, y - 2, 2 * half + 4, self.stripe_height + 4))
+                # Main stripe
+                pg.draw.rect(layer, WHITE, (lane_x - half, y, 2 * half, self.stripe_height))
+        return layer
+            
+    def draw(self, screen, alpha=1.0):
+        if self.base_layer is None:
+            self.build_layers()
+            
+        # Everything scrolls at a constant speed, so between ticks it sits a fraction of a step back
+        lag = 1.0 - alpha
+        scroll = int((self.scroll - self.stripe_speed * lag) % self.stripe_period)
+        
+        # The whole road pass is one blits batch: background, road tile, the visible scenery
+        # cut from the atlas (world y mapped onto the screen), then the edges over it all
+        batch = self.batch
+        batch.clear()
+        batch.append((self.base_layer, (0, 0)))
+        batch.append((self.road_layer(quality.tier["road_detail"]), (self.road_x, 0),
+                      (0, self.stripe_period - scroll, self.road_width, HEIGHT)))
+        atlas = self.atlas
+        cells = self.atlas_cells[quality.tier["scenery_detail"]]
+        bottom = self.distance + HEIGHT - BASE_SPEED * lag
+        for chunk in self.chunks.values():
+            for obj in chunk:
+                # Round down, so sprites keep moving a pixel at a time across the top edge
+                y = math.floor(bottom - obj.y)
+                if y > -50 and y < HEIGHT + 50:
+                    area, dx, dy = cells[obj.sprite]
+                    batch.append((atlas, (obj.x + dx, y + dy), area))
+        batch.extend(self.edge_layers)
+        screen.blits(batch, False)
             
     def update(self):
-        # Update road stripes
-        for stripe in self.stripes:
-            stripe['y'] += stripe['speed']
-            if stripe['y'] > HEIGHT:
-                stripe['y'] = -stripe['height'] - 50
+        # Scroll road stripes
+        self.scroll = (self.scroll + self.stripe_speed) % self.stripe_period
+                
+        # Advance through the world, loading and evicting scenery chunks
+        self.distance += BASE_SPEED
+        self.stream()
+
+# Fixed-timestep pacing: real time feeds an accumulator that is spent in whole simulation
+# ticks, with a bounded catch-up so one long frame cannot snowball into a spiral of ticks
+class FramePacer:
+    def __init__(self, tick_rate=FPS, max_ticks=5, window=240):
+        self.tick = 1.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.last = None
+        self.intervals = deque(maxlen=window)
+        self.tick_counts = deque(maxlen=window)
+        self.dropped_ticks = 0
+        
+    def advance(self):
+        # Ticks to simulate before drawing this frame
+        now = time.perf_counter()
+        if self.last is None:
+            self.last = now
+            return 0
+        elapsed = now - self.last
+        self.last = now
+        self.intervals.append(elapsed)
+        
+        self.accumulator += elapsed
+        ticks = int(self.accumulator / self.tick)
+        if ticks > self.max_ticks:
+            # Too far behind: run the allowed ticks and let the rest of the backlog go
+            self.dropped_ticks += ticks - self.max_ticks
+            ticks = self.max_ticks
+            self.accumulator = self.accumulator % self.tick
+        else:
+            self.accumulator -= ticks * self.tick
+        self.tick_counts.append(ticks)
+        return ticks
+    
+    @property
+    def alpha(self):
+        # How far the display is between the last tick and the next one
+        return min(1.0, self.accumulator / self.tick)
+    
+    def stats(self):
+        if not self.intervals:
+            return {"fps": 0.0, "frame_ms": 0.0, "jitter_ms": 0.0, "p99_ms": 0.0,
+                    "ticks_per_frame": 0.0, "dropped_ticks": self.dropped_ticks}
+        intervals = np.array(self.intervals) * 1000
+        return {
+            "fps": float(1000 / intervals.mean()),
+            "frame_ms": float(intervals.mean()),
+            "jitter_ms": float(intervals.std()),
+            "p99_ms": float(np.percentile(intervals, 99)),
+            "ticks_per_frame": sum(self.tick_counts) / len(self.tick_counts),
+            "dropped_ticks": self.dropped_ticks,
+        }
+
+# Low-overhead per-stage frame timer with a ring buffer of recent frames
+class FrameProfiler:
+    STAGES = ("events", "input", "spawn", "move", "collision", "road_update", "particles_update",
+              "background", "road_draw", "cars", "particles_draw", "hud", "overlays", "flip")
+    COLORS = [(120, 120, 120), (80, 200, 255), (50, 120, 220), (240, 220, 50), (230, 50, 50),
+              (128, 0, 128), (255, 165, 0), (60, 60, 90), (170, 170, 180), (50, 200, 50),
+              (255, 120, 200), (50, 220, 220), (200, 140, 60), (240, 240, 240)]
+    GRAPH_WIDTH = 300
+    GRAPH_HEIGHT = 90
+    
+    def __init__(self, frames=600, memory=None):
+        self.enabled = False
+        self.frames = frames
+        self.stage_index = {name: i for i, name in enumerate(self.STAGES)}
+        self.buffer = np.zeros((frames, len(self.STAGES)))
+        self.current = np.zeros(len(self.STAGES))
+        self.frame_count = 0
+        self.last = 0.0
+        self.overlay = None
+        # Optional MemoryProfiler that shares these stage laps
+        self.memory = memory
+        
+    def enable(self):
+        # Toggled mid-frame, after begin_frame was skipped: start the frame from here
+        if self.enabled:
+            return
+        self.enabled = True
+        self.current.fill(0.0)
+        self.last = time.perf_counter()
+        
+    def disable(self):
+        self.enabled = False
+        
+    def begin_frame(self):
+        if self.memory is not None and self.memory.enabled:
+            self.memory.begin_frame()
+        if self.enabled:
+            self.current.fill(0.0)
+            self.last = time.perf_counter()
+            
+    def lap(self, stage):
+        if self.memory is not None and self.memory.enabled:
+            self.memory.lap(stage)
+        # Charge the time since the previous lap to stage
+        if self.enabled:
+            now = time.perf_counter()
+            self.current[self.stage_index[stage]] += now - self.last
+            self.last = now
+            
+    def end_frame(self):
+        if self.memory is not None and self.memory.enabled:
+            self.memory.end_frame()
+        if self.enabled:
+            self.buffer[self.frame_count % self.frames] = self.current
+            self.frame_count += 1
+            
+    def recent(self):
+        # Recorded frames in order, oldest first, in milliseconds
+        count = min(self.frame_count, self.frames)
+        start = self.frame_count - count
+        rows = np.arange(start, self.frame_count) % self.frames
+        return self.buffer[rows] * 1000
+        
+    def build_overlay(self, font):
+        timings = self.recent()[-self.GRAPH_WIDTH:]
+        graph = np.zeros((self.GRAPH_WIDTH, self.GRAPH_HEIGHT, 3), np.uint8)
+        graph[:] = (20, 20, 25)
+        
+        # Stacked columns, with the frame budget at two thirds of the graph height
+        budget = 1000 / FPS
+        scale = self.GRAPH_HEIGHT * 2 / 3 / budget
+        if len(timings):
+            tops = np.cumsum(timings, axis=1) * scale
+            rows = np.arange(self.GRAPH_HEIGHT)[::-1] + 0.5
+            stage = (tops[:, None, :] < rows[None, :, None]).sum(axis=2)
+            palette = np.array(self.COLORS + [(20, 20, 25)], np.uint8)
+            graph[self.GRAPH_WIDTH - len(timings):] = palette[stage]
+        budget_row = self.GRAPH_HEIGHT - int(budget * scale)
+        graph[:, budget_row] = (255, 255, 255)
+        
+        legend_height = 16 * ((len(self.STAGES) + 1) // 2) + 24
+        self.overlay = new_surface((self.GRAPH_WIDTH + 20, self.GRAPH_HEIGHT + legend_height + 20), pg.SRCALPHA)
+        self.overlay.fill((0, 0, 0, 190))
+        graph_surface = surface_counter.track(pg.surfarray.make_surface(graph))
+        self.overlay.blit(graph_surface, (10, 10))
+        
+        means = timings.mean(axis=0) if len(timings) else np.zeros(len(self.STAGES))
+        title = readout_cache.render(font, f"Frame {means.sum():.2f} ms / {budget:.1f} ms budget", WHITE)
+        self.overlay.blit(title, (10, self.GRAPH_HEIGHT + 14))
+        for i, name in enumerate(self.STAGES):
+            x = 10 + (i % 2) * (self.GRAPH_WIDTH // 2)
+            y = self.GRAPH_HEIGHT + 36 + (i // 2) * 16
+            pg.draw.rect(self.overlay, self.COLORS[i], (x, y + 3, 8, 8))
+            label = readout_cache.render(font, f"{name} {means[i]:.2f}", WHITE)
+            self.overlay.blit(label, (x + 12, y))
+            
+    def draw(self, screen, font):
+        # The overlay is rebuilt a few times per second to keep its own cost down
+        if self.overlay is None or self.frame_count % 15 == 0:
+            self.build_overlay(font)
+        return screen.blit(self.overlay, (WIDTH - self.overlay.get_width() - 10, HEIGHT - self.overlay.get_height() - 10))
+        
+    def dump_csv(self, path):
+        timings = self.recent()
+        first = self.frame_count - len(timings)
+        with open(path, "w") as f:
+            f.write("frame," + ",".join(self.STAGES) + ",total\n")
+            for i, row in enumerate(timings):
+                f.write(f"{first + i}," + ",".join(f"{ms:.4f}" for ms in row) + f",{row.sum():.4f}\n")
+        return len(timings)
+
+# Pixel memory of the surfaces reachable from each root, following containers and this
+# module's own objects; surfaces reachable from several roots count for the first
+def surface_memory(roots):
+    seen = set()
+    
+    def walk(obj, depth):
+        if id(obj) in seen or depth > 8:
+            return 0
+        seen.add(id(obj))
+        if isinstance(obj, pg.Surface):
+            # Subsurfaces share their parent's pixels
+            return 0 if obj.get_parent() is not None else obj.get_pitch() * obj.get_height()
+        if isinstance(obj, dict):
+            children = obj.values()
+        elif isinstance(obj, (list, tuple, deque)):
+            children = obj
+        elif type(obj).__module__ != __name__:
+            return 0
+        elif hasattr(obj, "__dict__"):
+            children = vars(obj).values()
+        else:
+            children = (getattr(obj, name, None) for name in getattr(type(obj), "__slots__", ()))
+        return sum(walk(child, depth + 1) for child in children)
+    
+    return {name: walk(root, 0) for name, root in roots.items()}
+
+# Opt-in memory instrumentation on the frame profiler's stages: bytes allocated and blocks kept
+# per stage (tracemalloc and the interpreter's block count), surfaces created, GC pauses from
+# gc callbacks, and tracemalloc snapshots at each game state change for diffing
+class MemoryProfiler:
+    METRICS = ("alloc_kb", "net_blocks", "surfaces", "surface_kb")
+    
+    def __init__(self, frames=600, stages=FrameProfiler.STAGES):
+        self.enabled = False
+        self.stages = stages
+        self.stage_index = {name: i for i, name in enumerate(stages)}
+        self.current = np.zeros((len(self.METRICS), len(stages)))
+        self.resize(frames)
+        self.gc_ms = 0.0
+        self.gc_start = None
+        self.gc_pauses = deque(maxlen=4096)
+        self.snapshots = deque(maxlen=8)
+        self.state = None
+        self.started_tracing = False
+        self.end_blocks = self.end_peak = 0
+        
+    def resize(self, frames):
+        # Ring buffer of the last frames recorded; resizing drops what it held
+        self.frames = frames
+        self.buffer = np.zeros((frames, len(self.METRICS), len(self.stages)))
+        self.gc_buffer = np.zeros(frames)
+        self.frame_count = 0
+        
+    def enable(self, frames=None):
+        # frames: buffer length for this session, so a fixed-length run can be kept whole
+        if self.enabled:
+            return
+        if frames is not None and frames != self.frames:
+            self.resize(frames)
+        self.enabled = True
+        self.frame_count = 0
+        # F4 lands mid-frame, after begin_frame was skipped: drop the last session's partial frame
+        self.current.fill(0.0)
+        self.gc_ms = 0.0
+        self.gc_pauses.clear()
+        self.snapshots.clear()
+        self.state = None
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        gc.callbacks.append(self.on_gc)
+        self.mark()
+        
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        gc.callbacks.remove(self.on_gc)
+        if self.started_tracing:
+            tracemalloc.stop()
+            
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None:
+            pause = (time.perf_counter() - self.gc_start) * 1000
+            self.gc_start = None
+            self.gc_ms += pause
+            self.gc_pauses.append((info["generation"], pause))
+            
+    def mark(self):
+        # Start measuring the next stage
+        tracemalloc.reset_peak()
+        self.start_surfaces = surface_counter.created
+        self.start_surface_bytes = surface_counter.pixel_bytes
+        self.start_bytes = tracemalloc.get_traced_memory()[0]
+        self.start_blocks = sys.getallocatedblocks()
+        
+    def begin_frame(self):
+        self.current.fill(0.0)
+        self.gc_ms = 0.0
+        self.mark()
+        
+    def lap(self, stage):
+        # Readings go into attributes that also exist at mark(), so the profiler's own objects
+        # cancel out of the block count. The traced peak above the stage start also catches
+        # objects freed within the stage.
+        self.end_blocks = sys.getallocatedblocks()
+        self.end_peak = tracemalloc.get_traced_memory()[1]
+        current = self.current
+        column = self.stage_index[stage]
+        current[0, column] += (self.end_peak - self.start_bytes) / 1024
+        current[1, column] += self.end_blocks - self.start_blocks
+        current[2, column] += surface_counter.created - self.start_surfaces
+        current[3, column] += (surface_counter.pixel_bytes - self.start_surface_bytes) / 1024
+        self.mark()
+        
+    def end_frame(self):
+        row = self.frame_count % self.frames
+        self.buffer[row] = self.current
+        self.gc_buffer[row] = self.gc_ms
+        self.frame_count += 1
+        
+    def recent(self):
+        # Recorded frames in order, oldest first
+        count = min(self.frame_count, self.frames)
+        rows = np.arange(self.frame_count - count, self.frame_count) % self.frames
+        return self.buffer[rows], self.gc_buffer[rows]
+        
+    def observe_state(self, state):
+        # Heap snapshot whenever the game enters a new state
+        if self.enabled and state != self.state:
+            self.state = state
+            snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            self.snapshots.append((state.name, snapshot))
+            
+    def diff(self, limit=10):
+        # Largest heap changes between the last two snapshots
+        if len(self.snapshots) < 2:
+            return None
+        (before_label, before), (after_label, after) = self.snapshots[-2], self.snapshots[-1]
+        return before_label, after_label, after.compare_to(before, "lineno")[:limit]
+        
+    def summary(self):
+        # Means per frame over the recorded frames, per stage and in total, plus GC pauses
+        rows, gc_rows = self.recent()
+        means = rows.mean(axis=0) if len(rows) else np.zeros(self.current.shape)
+        pauses = [pause for _, pause in self.gc_pauses]
+        return {
+            "frames": len(rows),
+            "stages": {name: dict(zip(self.METRICS, means[:, i].tolist())) for i, name in enumerate(self.stages)},
+            "per_frame": dict(zip(self.METRICS, means.sum(axis=1).tolist())),
+            "gc": {
+                "collections": [sum(1 for generation, _ in self.gc_pauses if generation == g) for g in range(3)],
+                "ms_per_frame": float(gc_rows.mean()) if len(gc_rows) else 0.0,
+                "max_pause_ms": max(pauses, default=0.0),
+            },
+        }
+        
+    def report(self, roots):
+        summary = self.summary()
+        lines = [f"Memory over the last {summary['frames']} frames, mean per frame:",
+                 f"{'stage':18}{'alloc KB':>10}{'net blocks':>12}{'surfaces':>10}{'surface KB':>12}"]
+        rows = list(summary["stages"].items()) + [("total", summary["per_frame"])]
+        for name, stage in rows:
+            lines.append(f"{name:18}{stage['alloc_kb']:10.2f}{stage['net_blocks']:12.1f}"
+                         f"{stage['surfaces']:10.3f}{stage['surface_kb']:12.1f}")
+        
+        gc_stats = summary["gc"]
+        lines.append(f"GC: {sum(gc_stats['collections'])} collections "
+                     f"(gen0/1/2 {'/'.join(map(str, gc_stats['collections']))}), "
+                     f"{gc_stats['ms_per_frame']:.3f} ms per frame, max pause {gc_stats['max_pause_ms']:.2f} ms")
+        
+        held = sorted(surface_memory(roots).items(), key=lambda item: -item[1])
+        lines.append(f"Surfaces held: {sum(size for _, size in held) / 1024:.0f} KB ("
+                     + ", ".join(f"{name} {size / 1024:.0f} KB" for name, size in held if size) + ")")
+        
+        diff = self.diff()
+        if diff:
+            before, after, stats = diff
+            lines.append(f"Heap change {before} -> {after}:")
+            lines.extend(f"  {stat}" for stat in stats)
+        return "\n".join(lines)
+
+# Opt-in renderer that pushes only the screen regions changed this frame or the last
+class DirtyRectRenderer:
+    def __init__(self, full_threshold=0.4):
+        self.full_threshold = full_threshold
+        self.rects = []
+        self.previous = []
+        self.full = True
+        
+    def mark(self, rect):
+        self.rects.append(pg.Rect(rect))
+        
+    def mark_full(self):
+        self.full = True
+        
+    def present(self):
+        rects = self.previous + self.rects
+        screen_rect = pg.Rect(0, 0, WIDTH, HEIGHT)
+        area = sum(r.clip(screen_rect).width * r.clip(screen_rect).height for r in rects)
+        
+        # Large updates are cheaper as a single flip
+        if self.full or area > self.full_threshold * WIDTH * HEIGHT:
+            pg.display.flip()
+        elif rects:
+            pg.display.update(rects)
+            
+        self.previous = self.rects
+        self.rects = []
+        self.full = False
+
+# Compact input recording: the run's seed plus run-length encoded input bits
+class Replay:
+    MAGIC = b"USRR"
+    VERSION = 4
+    HEADER = struct.Struct("<4sBQIIBHH")  # magic, version, seed, frames, final score, lanes, lane width, traffic
+    RUN = struct.Struct("<BH")  # input bits, frames held
+    
+    def __init__(self, seed, geometry=DEFAULT_ROAD, traffic=0):
+        self.seed = seed
+        self.geometry = geometry
+        self.traffic = traffic
+        self.runs = []
+        self.frames = 0
+        self.final_score = 0
+        
+    def record(self, inputs):
+        if self.runs and self.runs[-1][0] == inputs and self.runs[-1][1] < 0xFFFF:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([inputs, 1])
+        self.frames += 1
+        
+    def inputs(self):
+        for inputs, length in self.runs:
+            for _ in range(length):
+                yield inputs
                 
-        # Update scenery
-        for obj in self.scenery_objects:
-            obj['y'] += BASE_SPEED
-            if obj['y'] > HEIGHT + 100:
-                obj['y'] = -100
-                obj['x'] = random.randint(10, 150) if obj['x'] < WIDTH // 2 else random.randint(WIDTH - 150, WIDTH - 10)
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.seed, self.frames, self.final_score,
+                                     self.geometry.lanes, self.geometry.lane_width, self.traffic))
+            f.write(b"".join(self.RUN.pack(inputs, length) for inputs, length in self.runs))
+            
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, frames, final_score, lanes, lane_width, traffic = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError(f"{path} is not a version {cls.VERSION} replay")
+        replay = cls(seed, RoadGeometry(lanes, lane_width), traffic)
+        replay.final_score = final_score
+        for inputs, length in cls.RUN.iter_unpack(data[cls.HEADER.size:]):
+            replay.runs.append([inputs, length])
+            replay.frames += length
+        if replay.frames != frames:
+            raise ValueError(f"{path} is truncated")
+        return replay
+        
+    def play(self):
+        # Re-simulate the run headlessly at uncapped speed
+        game = Game(headless=True, seed=self.seed, geometry=self.geometry, traffic=self.traffic)
+        game.state = GameState.PLAYING
+        for inputs in self.inputs():
+            if game.state != GameState.PLAYING:
+                break
+            game.step(inputs)
+        return game
 
 # Enhanced Game class with state management
 class Game:
-    def __init__(self):
-        self.screen = pg.display.set_mode((WIDTH, HEIGHT))
-        pg.display.set_caption("Ultimate Street Racer")
+    def __init__(self, headless=False, dirty_rects=False, seed=None, record_path=None, max_fps=MAX_RENDER_FPS,
+                 geometry=DEFAULT_ROAD, traffic=0):
+        # Headless games simulate without a window, sound or music
+        self.headless = headless
+        # traffic > 0 switches to stress mode: the spawner keeps that many cars on the road
+        self.geometry = geometry
+        self.traffic = traffic
+        self.startup = {"import": (time.perf_counter() - STARTED_AT) * 1000}
+        if headless:
+            self.screen = new_surface((WIDTH, HEIGHT))
+        else:
+            pg.display.init()
+            self.screen = pg.display.set_mode((WIDTH, HEIGHT))
+            pg.display.set_caption("Ultimate Street Racer")
+            self.startup["display"] = (time.perf_counter() - STARTED_AT) * 1000
+        # Audio loads in the background while the first frames draw; headless games have none
+        self.sound_manager = SoundManager(enabled=not headless)
+        self.background = None
+        self.panels = {}
+        self.renderer = DirtyRectRenderer() if dirty_rects and not headless else None
+        self.drawn_state = None
         self.clock = pg.time.Clock()
-        self.font = pg.font.Font(None, 42)
-        self.small_font = pg.font.Font(None, 28)
-        self.large_font = pg.font.Font(None, 64)
+        self.max_fps = max_fps
+        self.pacer = FramePacer()
+        self.alpha = 1.0
         
         # Game state
         self.state = GameState.MENU
-        self.player = Car(WIDTH // 2 - 22, HEIGHT - 120, BLUE, True)
-        self.obstacles = []
-        self.road = Road()
-        self.particle_system = ParticleSystem()
-        self.sound_manager = SoundManager()
-        
-        # Game variables
-        self.score = 0
-        self.level = 1
-        self.lives = 3
+        self.scores = ScoreService(None, None) if headless else ScoreService()
         self.power_ups = []
-        self.last_obstacle_time = 0
-        self.obstacle_frequency = 2000
-        self.min_obstacle_distance = 120
-        self.speed_boost = 1.0
-        self.speed_boost_timer = 0
+        self.record_path = record_path
+        self.car_pool = CarPool()
+        self.passed = []
+        self.hitbox = pg.Rect(0, 0, 0, 0)
+        self.obstacle_rects = []
+        self.player = None
+        self.start_run(seed)
         
         # UI elements
         self.play_button = Button(WIDTH//2 - 100, HEIGHT//2 - 30, 200, 60, "START RACE")
@@ -460,20 +1792,36 @@ class Game:
         self.restart_button = Button(WIDTH//2 - 100, HEIGHT//2 + 40, 200, 60, "RESTART")
         
         # Performance tracking
-        self.fps_counter = 0
+        self.fps_text = "FPS: -"
         self.fps_timer = 0
         self.show_fps = False
+        self.memory = MemoryProfiler()
+        self.profiler = FrameProfiler(memory=self.memory)
         
-        # Load and play music
-        self.current_music = load_music()
-        if self.current_music:
-            pg.mixer.music.play(-1)
+        # Music starts as soon as the background loader has found a track
+        if not headless:
+            self.sound_manager.play_music()
+    
+    @property
+    def font(self):
+        return get_font(42)
+    
+    @property
+    def small_font(self):
+        return get_font(28)
+    
+    @property
+    def large_font(self):
+        return get_font(64)
             
     def can_spawn_obstacle(self, new_x, new_y):
         new_rect = pg.Rect(new_x, new_y, 45, 80)
         
-        for obstacle in self.obstacles:
-            obstacle_rect = obstacle.get_rect()
+        # Only cars in neighbouring lanes and close in y can block the spawn slot
+        window = max(self.min_obstacle_distance, MAX_CAR_HEIGHT)
+        nearby = self.lane_index.nearby(self.get_lane_from_x(new_x), new_y - window, new_y + window)
+        for obstacle in nearby:
+            obstacle_rect = obstacle.rect
             if abs(new_y - obstacle.y) < self.min_obstacle_distance:
                 new_lane = self.get_lane_from_x(new_x)
                 obstacle_lane = obstacle.get_lane()
@@ -485,25 +1833,37 @@ class Game:
         
         return True
     
+    def spawn_obstacle(self, x, y):
+        colors = [(220, 60, 60), (60, 180, 60), (220, 140, 60), (180, 60, 180), (60, 60, 220)]
+        color = self.rng.choice(colors)
+        
+        new_obstacle = self.car_pool.acquire(x, y, color, self.rng, self.geometry)
+        new_obstacle.speed = self.rng.randint(2, 5) * self.speed_boost
+        new_obstacle.original_speed = new_obstacle.speed
+        self.obstacles.append(new_obstacle)
+        self.lane_index.add(new_obstacle)
+    
+    def spawn_traffic(self):
+        # Stress mode: top the road up to the traffic target by queueing cars above the screen,
+        # at most one per lane per tick, up to four screens deep
+        ceiling = -4 * HEIGHT
+        for lane in range(self.geometry.lanes):
+            if len(self.obstacles) >= self.traffic:
+                break
+            ys = self.lane_index.ys[lane]
+            spawn_y = min(-100, ys[0] - MAX_CAR_HEIGHT - 15) if ys else -100
+            if spawn_y >= ceiling:
+                self.spawn_obstacle(self.geometry.lane_center(lane) - 22, spawn_y)
+    
     def get_lane_from_x(self, x):
-        road_left = 175
-        road_right = WIDTH - 225
-        lane_width = (road_right - road_left) // 3
-        center_x = x + 22
-        relative_pos = center_x - road_left
-        return max(0, min(2, int(relative_pos // lane_width)))
+        return self.geometry.lane_at(x + 22)
     
     def get_safe_spawn_position(self):
-        road_left = 175
-        road_right = WIDTH - 225
-        lane_width = (road_right - road_left) // 3
-        
-        lanes = [0, 1, 2]
-        random.shuffle(lanes)
+        lanes = list(range(self.geometry.lanes))
+        self.rng.shuffle(lanes)
         
         for lane in lanes:
-            lane_center = road_left + lane * lane_width + lane_width // 2
-            spawn_x = lane_center - 22
+            spawn_x = self.geometry.lane_center(lane) - 22
             spawn_y = -100
             
             if self.can_spawn_obstacle(spawn_x, spawn_y):
@@ -514,8 +1874,10 @@ class Game:
     def handle_events(self):
         for event in pg.event.get():
             if event.type == pg.QUIT:
-                if self.current_music:
-                    pg.mixer.music.stop()
+                if self.memory.enabled:
+                    print(self.memory.report(self.memory_roots()))
+                self.sound_manager.stop_music()
+                self.scores.close()
                 pg.quit()
                 sys.exit()
                 
@@ -529,6 +1891,22 @@ class Game:
                     self.reset_game()
                 elif event.key == pg.K_F1:
                     self.show_fps = not self.show_fps
+                elif event.key == pg.K_F2:
+                    if self.profiler.enabled:
+                        self.profiler.disable()
+                    else:
+                        self.profiler.enable()
+                elif event.key == pg.K_F3 and self.profiler.frame_count:
+                    path = time.strftime("profile_%Y%m%d_%H%M%S.csv")
+                    rows = self.profiler.dump_csv(path)
+                    print(f"Saved {rows} profiled frames to {path}")
+                elif event.key == pg.K_F4:
+                    # Memory instrumentation; the report prints when it is switched off
+                    if self.memory.enabled:
+                        print(self.memory.report(self.memory_roots()))
+                        self.memory.disable()
+                    else:
+                        self.memory.enable()
                     
             if event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
                 if self.state == GameState.MENU and self.play_button.is_clicked(event.pos):
@@ -538,36 +1916,59 @@ class Game:
                 elif self.state == GameState.GAME_OVER and self.restart_button.is_clicked(event.pos):
                     self.reset_game()
     
+    def sim_time(self):
+        # Simulated milliseconds, so spawn timing does not depend on the frame rate
+        return self.frame * 1000 // FPS
+    
+    def anim_time(self):
+        # Clock for purely visual animations: wall time on screen, simulated time headless,
+        # so offscreen renders of the same run come out identical
+        return self.sim_time() if self.headless else pg.time.get_ticks()
+    
     def update(self):
         if self.state != GameState.PLAYING:
             return
             
+        # Handle player input
+        keys = pg.key.get_pressed()
+        inputs = 0
+        if keys[pg.K_LEFT] or keys[pg.K_a]:
+            inputs |= INPUT_LEFT
+        if keys[pg.K_RIGHT] or keys[pg.K_d]:
+            inputs |= INPUT_RIGHT
+        self.step(inputs)
+    
+    def step(self, inputs=0):
+        # Advance the simulation by one tick with the given input bits
+        self.frame += 1
+        self.replay.record(inputs)
+        for car in self.obstacles:
+            car.prev_x = car.x
+            car.prev_y = car.y
+        self.player.prev_x = self.player.x
+        self.player.prev_y = self.player.y
+        
         # Update speed boost
         if self.speed_boost_timer > 0:
             self.speed_boost_timer -= 1
             if self.speed_boost_timer == 0:
                 self.speed_boost = 1.0
                 
-        # Handle player input
-        keys = pg.key.get_pressed()
-        if keys[pg.K_LEFT] or keys[pg.K_a]:
+        if inputs & INPUT_LEFT:
             self.player.move("left")
-        if keys[pg.K_RIGHT] or keys[pg.K_d]:
+        if inputs & INPUT_RIGHT:
             self.player.move("right")
+        self.profiler.lap("input")
         
         # Spawn obstacles
-        current_time = pg.time.get_ticks()
-        if current_time - self.last_obstacle_time > self.obstacle_frequency:
+        current_time = self.sim_time()
+        if self.traffic:
+            self.spawn_traffic()
+        elif current_time - self.last_obstacle_time > self.obstacle_frequency:
             spawn_x, spawn_y = self.get_safe_spawn_position()
             
             if spawn_x is not None:
-                colors = [(220, 60, 60), (60, 180, 60), (220, 140, 60), (180, 60, 180), (60, 60, 220)]
-                color = random.choice(colors)
-                
-                new_obstacle = Car(spawn_x, spawn_y, color)
-                new_obstacle.speed = random.randint(2, 5) * self.speed_boost
-                new_obstacle.original_speed = new_obstacle.speed
-                self.obstacles.append(new_obstacle)
+                self.spawn_obstacle(spawn_x, spawn_y)
                 self.last_obstacle_time = current_time
                 
                 # Increase difficulty
@@ -578,79 +1979,114 @@ class Game:
                     if self.score % 50 == 0:
                         self.speed_boost = min(2.0, self.speed_boost + 0.2)
                         self.speed_boost_timer = 300  # 5 seconds at 60 FPS
-        
-        # Update obstacles
-        for obstacle in self.obstacles[:]:
-            if obstacle.move(obstacles=self.obstacles, player_car=self.player):
-                self.obstacles.remove(obstacle)
-                self.score += 1
-                
-                # Add score particles
-                self.particle_system.add_explosion(
-                    obstacle.x + obstacle.width // 2,
-                    HEIGHT + 20,
-                    GREEN,
-                    5
-                )
-                
-            # Enhanced collision detection
-            player_rect = self.player.get_rect()
-            obstacle_rect = obstacle.get_rect()
-            
-            buffer = 5
-            collision_rect = pg.Rect(
-                player_rect.x + buffer,
-                player_rect.y + buffer,
-                player_rect.width - 2 * buffer,
-                player_rect.height - 2 * buffer
-            )
+        self.profiler.lap("spawn")
+        
+        # Move traffic, compacting the list in place as cars leave the bottom of the screen
+        obstacles = self.obstacles
+        kept = 0
+        for obstacle in obstacles:
+            if obstacle.move(obstacles=obstacles, player_car=self.player, lane_index=self.lane_index):
+                self.lane_index.remove(obstacle)
+                self.passed.append(obstacle)
+            else:
+                self.lane_index.update(obstacle)
+                obstacles[kept] = obstacle
+                kept += 1
+        del obstacles[kept:]
+        self.profiler.lap("move")
+        
+        # Score the cars that got past
+        for obstacle in self.passed:
+            self.score += 1
+            self.sound_manager.play('score', 0.3)
             
-            if collision_rect.colliderect(obstacle_rect):
-                # Add crash effects
-                self.particle_system.add_explosion(
-                    player_rect.centerx,
-                    player_rect.centery,
-                    RED,
-                    15
-                )
-                self.particle_system.add_smoke(
-                    player_rect.centerx,
-                    player_rect.centery,
-                    10
-                )
-                
-                self.sound_manager.play('crash', 0.7)
-                
-                self.lives -= 1
-                if self.lives <= 0:
-                    self.state = GameState.GAME_OVER
-                    if self.current_music:
-                        pg.mixer.music.fadeout(2000)
-                else:
-                    # Remove the obstacle and give brief invincibility
-                    self.obstacles.remove(obstacle)
-                    # Reset player position
-                    self.player.x = WIDTH // 2 - 22
-                    self.player.velocity_x = 0
-                    break
+            # Add score particles
+            self.particle_system.add_explosion(
+                obstacle.x + obstacle.width // 2,
+                HEIGHT + 20,
+                GREEN,
+                5
+            )
+            self.car_pool.release(obstacle)
+        self.passed.clear()
+        
+        # Collisions are tested once, after everything has moved. The first contact ends the
+        # check: the player is reset (or the game is over), so any later contact is stale.
+        contacts = self.find_contacts()
+        if contacts:
+            self.crash(contacts[0])
+        self.profiler.lap("collision")
         
         # Update systems
         self.road.update()
+        self.profiler.lap("road_update")
         self.particle_system.update()
+        self.profiler.lap("particles_update")
+    
+    def find_contacts(self):
+        # Broad phase: the player's hitbox against every car's persistent rect in one call.
+        # Returns the cars in contact, in obstacle (spawn) order.
+        player = self.player.rect
+        buffer = 5
+        self.hitbox.update(player.x + buffer, player.y + buffer,
+                           player.width - 2 * buffer, player.height - 2 * buffer)
+        rects = self.obstacle_rects
+        rects.clear()
+        for obstacle in self.obstacles:
+            rects.append(obstacle.rect)
+        return [self.obstacles[i] for i in self.hitbox.collidelistall(rects)]
+    
+    def crash(self, obstacle):
+        # Add crash effects
+        player_rect = self.player.rect
+        self.particle_system.add_explosion(
+            player_rect.centerx,
+            player_rect.centery,
+            RED,
+            15
+        )
+        self.particle_system.add_smoke(
+            player_rect.centerx,
+            player_rect.centery,
+            10
+        )
         
-        # Update FPS counter
-        self.fps_timer += 1
-        if self.fps_timer >= 60:
-            self.fps_counter = int(self.clock.get_fps())
-            self.fps_timer = 0
+        self.sound_manager.play('crash', 0.7)
+        
+        self.lives -= 1
+        if self.lives <= 0:
+            self.state = GameState.GAME_OVER
+            self.save_high_score()
+            self.replay.final_score = self.score
+            if self.record_path:
+                self.replay.save(self.record_path)
+            self.sound_manager.fade_music(2000)
+        else:
+            # Remove the obstacle and give brief invincibility
+            self.obstacles.remove(obstacle)
+            self.lane_index.remove(obstacle)
+            self.car_pool.release(obstacle)
+            # Reset player position
+            self.player.x = self.player.prev_x = WIDTH // 2 - 22
+            self.player.velocity_x = 0
+            self.player.sync_rect()
     
     def draw(self):
-        # Enhanced background gradient
-        for y in range(HEIGHT):
-            night_factor = 0.8 + 0.2 * math.sin(y * 0.01)
-            shade = int(15 * night_factor)
-            color = (shade, shade, int(shade * 1.2))
-            pg.draw.line(self.screen, color, (0, y), (WIDTH, y))
+        # Enhanced background gradient, rendered once
+        if self.background is None:
+            self.background = new_surface((WIDTH, HEIGHT))
+            for y in range(HEIGHT):
+                night_factor = 0.8 + 0.2 * math.sin(y * 0.01)
+                shade = int(15 * night_factor)
+                color = (shade, shade, int(shade * 1.2))
+                pg.draw.line(self.background, color, (0, y), (WIDTH, y))
+        self.screen.blit(self.background, (0, 0))
+        self.profiler.lap("background")
+        
+        # Scrolling and pulsing screens change everywhere; so does any state switch
+        if self.state != self.drawn_state or self.state in (GameState.PLAYING, GameState.GAME_OVER):
+            self.mark_full()
+        self.drawn_state = self.state
         
         if self.state == GameState.MENU:
             self.draw_menu()
@@ -665,22 +2101,67 @@ class Game:
         
         # Draw FPS counter if enabled
         if self.show_fps:
-            fps_text = self.small_font.render(f"FPS: {self.fps_counter}", True, WHITE)
-            self.screen.blit(fps_text, (10, HEIGHT - 30))
+            fps_text = readout_cache.render(self.small_font, self.fps_text, WHITE)
+            self.mark_dirty(self.screen.blit(fps_text, (10, HEIGHT - 30)))
             
-        pg.display.flip()
+        # Frame-time graph
+        if self.profiler.enabled:
+            self.mark_dirty(self.profiler.draw(self.screen, get_font(18)))
+        self.profiler.lap("overlays")
+            
+        if self.renderer:
+            self.renderer.present()
+        elif not self.headless:
+            pg.display.flip()
+        self.profiler.lap("flip")
+        
+        if "first_frame" not in self.startup and not self.headless:
+            self.startup["first_frame"] = (time.perf_counter() - STARTED_AT) * 1000
+            self.report_startup()
+    
+    def memory_roots(self):
+        # Owners of the game's surfaces, for the memory report
+        roots = {"text cache": text_cache, "readouts": readout_cache, "car sprites": car_sprites}
+        roots.update(vars(self))
+        return roots
+    
+    def panel(self, size, fill, border=None, width=0, radius=0):
+        # Translucent HUD and overlay panels are drawn once per size and style, not every frame
+        key = (size, fill, border, width, radius)
+        surface = self.panels.get(key)
+        if surface is None:
+            surface = self.panels[key] = new_surface(size, pg.SRCALPHA)
+            surface.fill(fill)
+            if border:
+                pg.draw.rect(surface, border, (0, 0) + size, width, border_radius=radius)
+        return surface
+    
+    def report_startup(self):
+        startup = self.startup
+        audio = self.sound_manager.load_ms
+        audio = f"{audio:.0f} ms" if audio is not None else "still loading"
+        print(f"Startup: first frame after {startup['first_frame']:.0f} ms "
+              f"(imports {startup['import']:.0f} ms, window {startup['display']:.0f} ms, audio {audio})")
+    
+    def mark_dirty(self, rect):
+        if self.renderer:
+            self.renderer.mark(rect)
+            
+    def mark_full(self):
+        if self.renderer:
+            self.renderer.mark_full()
     
     def draw_menu(self):
         # Animated title
-        title_y = 100 + math.sin(pg.time.get_ticks() * 0.003) * 5
-        title = self.large_font.render("ULTIMATE STREET RACER", True, (255, 215, 0))
-        shadow = self.large_font.render("ULTIMATE STREET RACER", True, (100, 80, 0))
-        self.screen.blit(shadow, (WIDTH//2 - title.get_width()//2 + 3, title_y + 3))
-        self.screen.blit(title, (WIDTH//2 - title.get_width()//2, title_y))
+        title_y = 100 + math.sin(self.anim_time() * 0.003) * 5
+        title, offset = text_cache.render_layered(self.large_font, "ULTIMATE STREET RACER",
+                                                  [((100, 80, 0), (3, 3)), ((255, 215, 0), (0, 0))])
+        title_x = WIDTH//2 - (title.get_width() - 3)//2
+        self.mark_dirty(self.screen.blit(title, (title_x + offset[0], title_y + offset[1])))
         
         # Subtitle
-        subtitle = self.font.render("Enhanced Edition", True, CYAN)
-        self.screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, title_y + 80))
+        subtitle = text_cache.render(self.font, "Enhanced Edition", CYAN)
+        self.mark_dirty(self.screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, title_y + 80)))
         
         # Instructions with icons
         instructions = [
@@ -693,46 +2174,47 @@ class Game:
         ]
         
         for i, line in enumerate(instructions):
-            text = self.small_font.render(line, True, WHITE)
+            text = text_cache.render(self.small_font, line, WHITE)
             self.screen.blit(text, (WIDTH//2 - text.get_width()//2, 220 + i*35))
         
         # Animated road preview
         preview_y = 350
         pg.draw.rect(self.screen, ROAD_COLOR, (WIDTH//2 - 100, preview_y, 200, 100))
+        self.mark_dirty((WIDTH//2 - 100, preview_y - 30, 200, 160))
         
         # Moving stripes
-        stripe_offset = (pg.time.get_ticks() // 50) % 60
+        stripe_offset = (self.anim_time() // 50) % 60
         for i in range(4):
             stripe_y = preview_y + i * 30 - stripe_offset
             if stripe_y > preview_y - 30 and stripe_y < preview_y + 130:
                 pg.draw.rect(self.screen, WHITE, (WIDTH//2 - 15, stripe_y, 30, 20))
         
         # Mini car
-        mini_car_x = WIDTH//2 - 15 + math.sin(pg.time.get_ticks() * 0.005) * 20
+        mini_car_x = WIDTH//2 - 15 + math.sin(self.anim_time() * 0.005) * 20
         pg.draw.rect(self.screen, BLUE, (mini_car_x, preview_y + 60, 30, 20))
         
-        self.play_button.draw(self.screen, self.font)
+        self.mark_dirty(self.play_button.draw(self.screen, self.font))
         
         # Version info
-        version_text = self.small_font.render("v2.0 - Enhanced Edition", True, GRAY)
+        version_text = text_cache.render(self.small_font, "v2.0 - Enhanced Edition", GRAY)
         self.screen.blit(version_text, (10, HEIGHT - 25))
     
     def draw_game(self):
-        self.road.draw(self.screen)
+        self.road.draw(self.screen, self.alpha)
+        self.profiler.lap("road_draw")
         
         # Draw all cars
-        all_cars = [self.player] + self.obstacles
-        for car in all_cars:
-            car.draw(self.screen)
+        self.player.draw(self.screen, self.alpha)
+        for car in self.obstacles:
+            car.draw(self.screen, self.alpha)
+        self.profiler.lap("cars")
         
         # Draw particle effects
-        self.particle_system.draw(self.screen)
+        self.particle_system.draw(self.screen, self.alpha)
+        self.profiler.lap("particles_draw")
         
         # Enhanced HUD
-        hud_bg = pg.Surface((300, 140), pg.SRCALPHA)
-        hud_bg.fill((0, 0, 0, 180))
-        pg.draw.rect(hud_bg, (255, 255, 255, 50), (0, 0, 300, 140), 2, border_radius=10)
-        self.screen.blit(hud_bg, (10, 10))
+        self.screen.blit(self.panel((300, 140), (0, 0, 0, 180), (255, 255, 255, 50), 2, 10), (10, 10))
         
         # HUD content
         hud_texts = [
@@ -743,36 +2225,36 @@ class Game:
         ]
         
         for i, text in enumerate(hud_texts):
-            rendered = self.small_font.render(text, True, WHITE)
+            rendered = text_cache.render(self.small_font, text, WHITE)
             self.screen.blit(rendered, (20, 20 + i*30))
         
         # Speed boost indicator
         if self.speed_boost > 1.0:
-            boost_text = self.small_font.render(f"SPEED BOOST! {self.speed_boost:.1f}x", True, YELLOW)
-            boost_bg = pg.Surface((boost_text.get_width() + 20, 30), pg.SRCALPHA)
-            boost_bg.fill((255, 255, 0, 100))
+            boost_text = text_cache.render(self.small_font, f"SPEED BOOST! {self.speed_boost:.1f}x", YELLOW)
+            boost_bg = self.panel((boost_text.get_width() + 20, 30), (255, 255, 0, 100))
             self.screen.blit(boost_bg, (WIDTH//2 - boost_text.get_width()//2 - 10, 50))
             self.screen.blit(boost_text, (WIDTH//2 - boost_text.get_width()//2, 55))
         
         # Level up notification
-        if self.score > 0 and self.score % 10 == 0 and pg.time.get_ticks() % 1000 < 500:
-            level_text = self.font.render(f"LEVEL {self.level}!", True, GREEN)
-            self.screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, HEIGHT//2 - 50))
+        if self.score > 0 and self.score % 10 == 0:
+            level_text = text_cache.render(self.font, f"LEVEL {self.level}!", GREEN)
+            level_pos = (WIDTH//2 - level_text.get_width()//2, HEIGHT//2 - 50)
+            if self.anim_time() % 1000 < 500:
+                self.screen.blit(level_text, level_pos)
+            # Blinks even while paused
+            self.mark_dirty(level_text.get_rect(topleft=level_pos))
+        self.profiler.lap("hud")
     
     def draw_pause_overlay(self):
         # Semi-transparent overlay
-        overlay = pg.Surface((WIDTH, HEIGHT), pg.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.panel((WIDTH, HEIGHT), (0, 0, 0, 150)), (0, 0))
         
         # Pause box
-        box = pg.Surface((400, 300), pg.SRCALPHA)
-        box.fill((0, 0, 0, 200))
-        pg.draw.rect(box, (255, 255, 255, 100), (0, 0, 400, 300), 3, border_radius=15)
+        box = self.panel((400, 300), (0, 0, 0, 200), (255, 255, 255, 100), 3, 15)
         self.screen.blit(box, (WIDTH//2 - 200, HEIGHT//2 - 150))
         
         # Pause text
-        pause_title = self.large_font.render("PAUSED", True, YELLOW)
+        pause_title = text_cache.render(self.large_font, "PAUSED", YELLOW)
         self.screen.blit(pause_title, (WIDTH//2 - pause_title.get_width()//2, HEIGHT//2 - 100))
         
         # Instructions
@@ -783,34 +2265,28 @@ class Game:
         ]
         
         for i, instruction in enumerate(instructions):
-            text = self.small_font.render(instruction, True, WHITE)
+            text = text_cache.render(self.small_font, instruction, WHITE)
             self.screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - 20 + i*30))
         
-        self.pause_button.draw(self.screen, self.font)
+        self.mark_dirty(self.pause_button.draw(self.screen, self.font))
     
     def draw_game_over(self):
-        # Dark overlay with pulsing effect
-        alpha = 180 + int(20 * math.sin(pg.time.get_ticks() * 0.01))
-        overlay = pg.Surface((WIDTH, HEIGHT), pg.SRCALPHA)
-        overlay.fill((0, 0, 0, alpha))
-        self.screen.blit(overlay, (0, 0))
+        # Dark overlay with pulsing effect, darkened in place without a full-screen alpha surface
+        if quality.tier["overlay_pulse"]:
+            shade = 75 - int(20 * math.sin(self.anim_time() * 0.01))
+        else:
+            shade = 75
+        self.screen.fill((shade, shade, shade), special_flags=pg.BLEND_MULT)
         
         # Game over box
-        box = pg.Surface((500, 400), pg.SRCALPHA)
-        box.fill((20, 20, 20, 220))
-        pg.draw.rect(box, (255, 50, 50, 150), (0, 0, 500, 400), 4, border_radius=20)
+        box = self.panel((500, 400), (20, 20, 20, 220), (255, 50, 50, 150), 4, 20)
         self.screen.blit(box, (WIDTH//2 - 250, HEIGHT//2 - 200))
         
         # Game over text with glow effect
-        game_over_text = self.large_font.render("GAME OVER", True, RED)
-        glow_text = self.large_font.render("GAME OVER", True, (255, 100, 100))
-        
-        # Draw glow
-        for offset in [(2, 2), (-2, 2), (2, -2), (-2, -2)]:
-            self.screen.blit(glow_text, (WIDTH//2 - game_over_text.get_width()//2 + offset[0], 
-                                       HEIGHT//2 - 150 + offset[1]))
-        
-        self.screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 150))
+        glow = [((255, 100, 100), offset) for offset in [(2, 2), (-2, 2), (2, -2), (-2, -2)]]
+        game_over_text, offset = text_cache.render_layered(self.large_font, "GAME OVER", glow + [(RED, (0, 0))])
+        text_width = game_over_text.get_width() - 4
+        self.screen.blit(game_over_text, (WIDTH//2 - text_width//2 + offset[0], HEIGHT//2 - 150 + offset[1]))
         
         # Stats
         stats = [
@@ -821,7 +2297,7 @@ class Game:
         
         for i, stat in enumerate(stats):
             text_color = YELLOW if "High Score" in stat else WHITE
-            text = self.font.render(stat, True, text_color)
+            text = text_cache.render(self.font, stat, text_color)
             self.screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - 80 + i*40))
         
         # Performance rating
@@ -838,7 +2314,7 @@ class Game:
             rating = "ROOKIE"
             rating_color = WHITE
             
-        rating_text = self.font.render(rating, True, rating_color)
+        rating_text = text_cache.render(self.font, rating, rating_color)
         self.screen.blit(rating_text, (WIDTH//2 - rating_text.get_width()//2, HEIGHT//2 + 40))
         
         # Controls
@@ -848,105 +2324,169 @@ class Game:
         ]
         
         for i, control in enumerate(controls):
-            text = self.small_font.render(control, True, WHITE)
+            text = text_cache.render(self.small_font, control, WHITE)
             self.screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 + 100 + i*25))
         
-        self.restart_button.draw(self.screen, self.font)
+        self.mark_dirty(self.restart_button.draw(self.screen, self.font))
     
     def get_high_score(self):
-        try:
-            with open("highscore.txt", "r") as f:
-                return int(f.read().strip())
-        except:
-            return 0
+        return self.scores.high_score
     
     def save_high_score(self):
-        try:
-            high_score = max(self.score, self.get_high_score())
-            with open("highscore.txt", "w") as f:
-                f.write(str(high_score))
-        except:
-            pass
+        self.scores.submit(self.score, self.level, self.seed)
     
-    def reset_game(self):
-        self.save_high_score()
-        
-        # Reset game state
-        self.state = GameState.PLAYING
-        self.player = Car(WIDTH // 2 - 22, HEIGHT - 120, BLUE, True)
-        self.obstacles = []
-        self.particle_system = ParticleSystem()
-        self.road = Road()
+    def start_run(self, seed=None):
+        # Every run is driven by its own seed and frame counter, so it can be replayed
+        # Seeds stay below MAX_SEED, so they fit the leaderboard's signed integer column
+        self.seed = random.randrange(MAX_SEED) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.replay = Replay(self.seed, self.geometry, self.traffic)
+        
+        # Entities of the previous run are reset in place rather than reallocated
+        if self.player is None:
+            self.player = Car(WIDTH // 2 - 22, HEIGHT - 120, BLUE, True, self.rng, self.geometry)
+            self.obstacles = []
+            self.lane_index = LaneIndex(self.geometry.lanes)
+            self.road = Road(self.rng, self.geometry)
+            self.particle_system = ParticleSystem(rng=self.rng)
+        else:
+            self.player.reset(WIDTH // 2 - 22, HEIGHT - 120, BLUE, True, self.rng, self.geometry)
+            for car in self.obstacles:
+                self.car_pool.release(car)
+            self.obstacles.clear()
+            self.lane_index.clear()
+            self.road.reset(self.rng)
+            self.particle_system.reset(self.rng)
         
-        # Reset game variables
+        # Game variables
         self.score = 0
         self.level = 1
         self.lives = 3
-        self.last_obstacle_time = pg.time.get_ticks()
+        self.frame = 0
         self.obstacle_frequency = 2000
+        self.last_obstacle_time = 0
         self.min_obstacle_distance = 120
         self.speed_boost = 1.0
         self.speed_boost_timer = 0
+    
+    def reset_game(self, seed=None):
+        # Reset game state
+        self.state = GameState.PLAYING
+        self.start_run(seed)
         
         # Restart music
-        if self.current_music:
-            pg.mixer.music.play(-1)
+        self.sound_manager.play_music()
     
     def run(self):
+        # Startup objects live for the whole session; keep them out of the collector's full scans
+        gc.collect()
+        gc.freeze()
+        
+        # The simulation ticks at FPS; frames are drawn as often as max_fps allows (0 = uncapped)
         while True:
+            frame_start = time.perf_counter()
+            self.profiler.begin_frame()
             self.handle_events()
-            self.update()
+            self.profiler.lap("events")
+            for _ in range(self.pacer.advance()):
+                self.update()
+            # Frozen states have nothing to interpolate
+            self.alpha = self.pacer.alpha if self.state == GameState.PLAYING else 1.0
+            self.sound_manager.set_engine(self.speed_boost if self.state == GameState.PLAYING else None)
+            
+            # Refresh the pacing readout about twice a second
+            self.fps_timer += 1
+            if self.fps_timer >= 30:
+                self.fps_timer = 0
+                stats = self.pacer.stats()
+                self.fps_text = (f"FPS: {stats['fps']:.0f}  tick x{stats['ticks_per_frame']:.2f}  "
+                                 f"jitter {stats['jitter_ms']:.1f} ms  p99 {stats['p99_ms']:.1f} ms  "
+                                 f"dropped {stats['dropped_ticks']}  quality {quality.tier['name']}")
             self.draw()
-            self.clock.tick(FPS)
+            self.profiler.end_frame()
+            self.memory.observe_state(self.state)
+            quality.record(time.perf_counter() - frame_start)
+            self.clock.tick(self.max_fps)
+    
+    def run_headless(self, policy=None, max_frames=None):
+        # Simulate one game as fast as possible; policy(game) returns input bits
+        self.state = GameState.PLAYING
+        while self.state == GameState.PLAYING:
+            if max_frames is not None and self.frame >= max_frames:
+                break
+            self.step(policy(self) if policy else 0)
+        return self.score
+
+# Simple scripted driver: steer away from the nearest car ahead in our lane
+def dodge_policy(game):
+    player = game.player
+    lane = player.get_lane()
+    danger = None
+    for obstacle in game.obstacles:
+        if obstacle.get_lane() == lane and player.y - 250 < obstacle.y < player.y + player.height:
+            if danger is None or obstacle.y > danger.y:
+                danger = obstacle
+    if danger is None:
+        return 0
+    
+    lanes_ahead = {obstacle.get_lane() for obstacle in game.obstacles
+                   if player.y - 250 < obstacle.y < player.y + player.height}
+    for target in (lane - 1, lane + 1):
+        if 0 <= target < game.geometry.lanes and target not in lanes_ahead:
+            return INPUT_LEFT if target < lane else INPUT_RIGHT
+    return 0
+
+def run_headless_batch(games, max_frames=None, seed=0, **game_kwargs):
+    start = time.perf_counter()
+    scores = []
+    frames = 0
+    for i in range(games):
+        game = Game(headless=True, seed=seed + i, **game_kwargs)
+        scores.append(game.run_headless(dodge_policy, max_frames))
+        frames += game.frame
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {games} games ({frames} frames) in {elapsed:.2f}s "
+          f"- {frames / max(elapsed, 1e-9):.0f} frames/s")
+    print(f"Score: mean {sum(scores) / len(scores):.1f}, best {max(scores)}")
 
 # Enhanced Button class with animations
 class Button:
+    HOVER_SCALE = 1.05
+    SCALE_STEPS = 6
+    
     def __init__(self, x, y, width, height, text):
         self.rect = pg.Rect(x, y, width, height)
         self.text = text
         self.color = (50, 180, 80)
         self.hover_color = (80, 220, 120)
         self.click_color = (30, 140, 60)
-        self.shadow = pg.Surface((width, height), pg.SRCALPHA)
+        self.shadow = new_surface((width, height), pg.SRCALPHA)
         self.shadow.fill((0, 0, 0, 80))
         self.hover_scale = 1.0
         self.target_scale = 1.0
         self.is_pressed = False
         
-    def draw(self, screen, font):
-        mouse_pos = pg.mouse.get_pos()
-        mouse_pressed = pg.mouse.get_pressed()[0]
+        # Pre-rendered frames per (font, color, glow, scale step)
+        self.frames = {}
         
-        # Update hover state
-        if self.rect.collidepoint(mouse_pos):
-            self.target_scale = 1.05
-            color = self.click_color if mouse_pressed else self.hover_color
-            self.is_pressed = mouse_pressed
-        else:
-            self.target_scale = 1.0
-            color = self.color
-            self.is_pressed = False
+    def render_frame(self, font, color, glow, scale):
+        # Shadow, gradient body, border, label and hover glow baked into one
+        # premultiplied-alpha surface that covers the glow margin
+        scaled_width = int(self.rect.width * scale)
+        scaled_height = int(self.rect.height * scale)
+        frame = new_surface((scaled_width + 20, scaled_height + 20), pg.SRCALPHA)
         
-        # Smooth scaling animation
-        self.hover_scale += (self.target_scale - self.hover_scale) * 0.2
-        
-        # Calculate scaled dimensions
-        scaled_width = int(self.rect.width * self.hover_scale)
-        scaled_height = int(self.rect.height * self.hover_scale)
-        scaled_rect = pg.Rect(
-            self.rect.centerx - scaled_width // 2,
-            self.rect.centery - scaled_height // 2,
-            scaled_width,
-            scaled_height
-        )
+        def layer(surface, pos):
+            # Copy first: font surfaces can have padded rows, which premul_alpha() mishandles
+            copy = new_surface(surface.get_size(), pg.SRCALPHA)
+            copy.blit(surface, (0, 0), special_flags=pg.BLEND_RGBA_MAX)
+            frame.blit(surface_counter.track(copy.premul_alpha()), pos, special_flags=pg.BLEND_PREMULTIPLIED)
         
         # Draw shadow
-        shadow_rect = pg.Rect(scaled_rect.x + 3, scaled_rect.y + 3, scaled_width, scaled_height)
-        shadow_surface = pg.transform.scale(self.shadow, (scaled_width, scaled_height))
-        screen.blit(shadow_surface, shadow_rect)
+        layer(surface_counter.track(pg.transform.scale(self.shadow, (scaled_width, scaled_height))), (13, 13))
         
         # Draw button with gradient effect
-        button_surface = pg.Surface((scaled_width, scaled_height), pg.SRCALPHA)
+        button_surface = new_surface((scaled_width, scaled_height), pg.SRCALPHA)
         
         # Gradient background
         for i in range(scaled_height):
@@ -959,33 +2499,133 @@ class Button:
         
         # Border
         pg.draw.rect(button_surface, (255, 255, 255, 120), (0, 0, scaled_width, scaled_height), 3, border_radius=10)
-        
-        screen.blit(button_surface, scaled_rect)
+        layer(button_surface, (10, 10))
         
         # Button text with shadow
-        text_surface = font.render(self.text, True, WHITE)
-        text_shadow = font.render(self.text, True, (0, 0, 0, 150))
+        text_surface = text_cache.render(font, self.text, WHITE)
+        text_shadow = text_cache.render(font, self.text, (0, 0, 0, 150))
+        text_rect = text_surface.get_rect(center=(10 + scaled_width // 2, 10 + scaled_height // 2))
+        layer(text_shadow, (text_rect.x + 2, text_rect.y + 2))
+        layer(text_surface, text_rect)
         
-        text_rect = text_surface.get_rect(center=scaled_rect.center)
-        shadow_rect = pg.Rect(text_rect.x + 2, text_rect.y + 2, text_rect.width, text_rect.height)
+        # Glow effect when hovered
+        if glow:
+            glow_surface = new_surface((scaled_width + 20, scaled_height + 20), pg.SRCALPHA)
+            pg.draw.rect(glow_surface, (*color, 30), glow_surface.get_rect(), border_radius=15)
+            layer(glow_surface, (0, 0))
+        return frame
         
-        screen.blit(text_shadow, shadow_rect)
-        screen.blit(text_surface, text_rect)
+    def draw(self, screen, font):
+        if pg.display.get_init():
+            mouse_pos = pg.mouse.get_pos()
+            mouse_pressed = pg.mouse.get_pressed()[0]
+        else:
+            # Headless games have no pointer
+            mouse_pos, mouse_pressed = (-1, -1), False
         
-        # Glow effect when hovered
-        if self.target_scale > 1.0:
-            glow_surface = pg.Surface((scaled_width + 20, scaled_height + 20), pg.SRCALPHA)
-            glow_rect = pg.Rect(0, 0, scaled_width + 20, scaled_height + 20)
-            pg.draw.rect(glow_surface, (*color, 30), glow_rect, border_radius=15)
-            screen.blit(glow_surface, (scaled_rect.x - 10, scaled_rect.y - 10))
+        # Update hover state
+        if self.rect.collidepoint(mouse_pos):
+            self.target_scale = self.HOVER_SCALE
+            color = self.click_color if mouse_pressed else self.hover_color
+            self.is_pressed = mouse_pressed
+        else:
+            self.target_scale = 1.0
+            color = self.color
+            self.is_pressed = False
+        
+        # Smooth scaling animation, snapped to a few pre-rendered steps
+        self.hover_scale += (self.target_scale - self.hover_scale) * 0.2
+        step = round((self.hover_scale - 1.0) / (self.HOVER_SCALE - 1.0) * (self.SCALE_STEPS - 1))
+        step = max(0, min(self.SCALE_STEPS - 1, step))
+        glow = self.target_scale > 1.0
+        
+        key = (font, color, glow, step)
+        frame = self.frames.get(key)
+        if frame is None:
+            scale = 1.0 + (self.HOVER_SCALE - 1.0) * step / (self.SCALE_STEPS - 1)
+            frame = self.frames[key] = self.render_frame(font, color, glow, scale)
+        
+        # The frame is centered on the button, with a 10px margin for the glow
+        frame_pos = (self.rect.centerx - (frame.get_width() - 20) // 2 - 10,
+                     self.rect.centery - (frame.get_height() - 20) // 2 - 10)
+        return screen.blit(frame, frame_pos, special_flags=pg.BLEND_PREMULTIPLIED)
         
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
+def seed_arg(text):
+    try:
+        seed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid seed: {text!r}")
+    if not 0 <= seed < MAX_SEED:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and {MAX_SEED - 1}")
+    return seed
+
 # Run the game
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ultimate Street Racer")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate games without a window at uncapped speed")
+    parser.add_argument("--games", type=int, default=100,
+                        help="number of games to simulate in headless mode")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="frame limit per headless game")
+    parser.add_argument("--seed", type=seed_arg, default=None,
+                        help="seed for the first run (headless batches use seed, seed+1, ...)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save the inputs of each finished run as a replay")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="play a recorded run back headlessly and report the result")
+    parser.add_argument("--leaderboard", action="store_true",
+                        help="print the best scores and exit")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="update only changed screen regions instead of flipping every frame")
+    parser.add_argument("--stress", action="store_true",
+                        help=f"stress mode: a {STRESS_ROAD.lanes}-lane highway kept full of traffic")
+    parser.add_argument("--traffic", type=int, default=300,
+                        help="cars kept on the road in stress mode")
+    parser.add_argument("--quality", choices=["auto"] + [tier["name"] for tier in QUALITY_TIERS],
+                        default="auto", help="visual quality tier (auto adapts to the measured frame time)")
+    parser.add_argument("--memory", action="store_true",
+                        help="start with memory instrumentation on (F4 toggles it and prints the report)")
+    parser.add_argument("--fps", type=int, default=MAX_RENDER_FPS,
+                        help="cap on drawn frames per second (0 = uncapped); the simulation always "
+                             f"ticks at {FPS} Hz")
+    args = parser.parse_args()
+    
+    if args.leaderboard:
+        scores = ScoreService(None, "leaderboard.db")
+        for rank, (score, level, seed, played_on) in enumerate(scores.top(), 1):
+            print(f"{rank:2}. {score:5}  level {level:3}  {played_on}  seed {seed}")
+        scores.close()
+        sys.exit()
+    
+    if args.replay:
+        replay = Replay.load(args.replay)
+        start = time.perf_counter()
+        game = replay.play()
+        elapsed = time.perf_counter() - start
+        match = "matches" if game.score == replay.final_score else "DOES NOT match"
+        print(f"Replayed seed {replay.seed}: {game.frame} frames in {elapsed:.3f}s, "
+              f"score {game.score} ({match} recorded {replay.final_score})")
+        sys.exit()
+    
+    road = {"geometry": STRESS_ROAD, "traffic": args.traffic} if args.stress else {}
+    
+    if args.headless:
+        run_headless_batch(args.games, args.frames, args.seed or 0, **road)
+        sys.exit()
+    
+    quality.enabled = args.quality == "auto"
+    if not quality.enabled:
+        quality.set_tier([tier["name"] for tier in QUALITY_TIERS].index(args.quality))
+    
     try:
-        game = Game()
+        game = Game(dirty_rects=args.dirty_rects, seed=args.seed, record_path=args.record, max_fps=args.fps,
+                    **road)
+        if args.memory:
+            game.memory.enable()
         game.run()
     except Exception as e:
         print(f"Game error: {e}")
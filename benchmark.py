@@ -0,0 +1,332 @@
+import os
+
+# Benchmarks run without a window or audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+import pygame as pg
+
+from atari import Car, Game, GameState, HEIGHT, RED, STRESS_ROAD, WIDTH, dodge_policy
+
+CAR_COLORS = [(220, 60, 60), (60, 180, 60), (220, 140, 60), (180, 60, 180), (60, 60, 220)]
+
+# Seeded scenario builders
+def make_game(seed, state=GameState.PLAYING, boost=False, geometry=None):
+    random.seed(seed)
+    game = Game(headless=True, seed=seed, **({"geometry": geometry} if geometry else {}))
+    game.state = state
+    # Crashes must not end a benchmark run
+    game.lives = 10 ** 9
+    if boost:
+        game.speed_boost = 2.0
+        game.speed_boost_timer = 10 ** 9
+    return game
+
+def add_traffic(game, count):
+    # Top the road up to count cars, queued above the screen in random lanes
+    geometry = game.geometry
+    while len(game.obstacles) < count:
+        lane = random.randrange(geometry.lanes)
+        x = geometry.lane_center(lane) - 22
+        y = random.randint(-40 * count, -100)
+        car = Car(x, y, random.choice(CAR_COLORS), road=geometry)
+        car.speed = random.randint(2, 5) * game.speed_boost
+        car.original_speed = car.speed
+        game.obstacles.append(car)
+        game.lane_index.add(car)
+
+def add_particles(game, count):
+    particles = game.particle_system
+    while particles.count < count and particles.free_top > 0:
+        particles.add_explosion(random.randint(0, WIDTH), random.randint(0, HEIGHT), RED, 15)
+        particles.add_smoke(random.randint(0, WIDTH), random.randint(0, HEIGHT), 10)
+
+# Each scenario returns (game, prepare, frame): prepare runs untimed before every frame
+def update_scenario(cars, particles=0, boost=False, geometry=None):
+    def build(seed):
+        game = make_game(seed, boost=boost, geometry=geometry)
+
+        def prepare():
+            add_traffic(game, cars)
+            add_particles(game, particles)
+        return game, prepare, lambda: game.step(0)
+    return build
+
+def car_move_scenario(cars):
+    def build(seed):
+        game = make_game(seed)
+
+        def frame():
+            for obstacle in game.obstacles:
+                obstacle.move(obstacles=game.obstacles, player_car=game.player, lane_index=game.lane_index)
+                game.lane_index.update(obstacle)
+
+        def prepare():
+            # Recycle cars that left the screen
+            for obstacle in [o for o in game.obstacles if o.y > HEIGHT + 50]:
+                game.obstacles.remove(obstacle)
+                game.lane_index.remove(obstacle)
+            add_traffic(game, cars)
+        return game, prepare, frame
+    return build
+
+def car_draw_scenario(cars):
+    def build(seed):
+        game = make_game(seed)
+        add_traffic(game, cars)
+        for obstacle in game.obstacles:
+            obstacle.y = random.randint(-50, HEIGHT)
+
+        def frame():
+            for car in [game.player] + game.obstacles:
+                car.draw(game.screen)
+        return game, lambda: game.player.move("left"), frame
+    return build
+
+def road_scenario(draw):
+    def build(seed):
+        game = make_game(seed)
+
+        def frame():
+            game.road.update()
+            if draw:
+                game.road.draw(game.screen)
+        return game, lambda: None, frame
+    return build
+
+def particle_scenario(count, draw):
+    def build(seed):
+        game = make_game(seed)
+        particles = game.particle_system
+
+        def frame():
+            particles.update()
+            if draw:
+                particles.draw(game.screen)
+        return game, lambda: add_particles(game, count), frame
+    return build
+
+def draw_scenario(state, cars=20, particles=200):
+    def build(seed):
+        game = make_game(seed, state=state)
+        # The HUD draws one heart per life
+        game.lives = 3
+        add_traffic(game, cars)
+        for obstacle in game.obstacles:
+            obstacle.y = random.randint(-50, HEIGHT)
+        game.score = 30
+
+        def frame():
+            game.road.update()
+            game.draw()
+        return game, lambda: add_particles(game, particles), frame
+    return build
+
+SCENARIOS = {
+    "update/empty": update_scenario(0),
+    "update/20-cars": update_scenario(20),
+    "update/100-cars": update_scenario(100),
+    "update/20-cars-boost": update_scenario(20, boost=True),
+    "update/20-cars-2000-particles": update_scenario(20, particles=2000),
+    "car.move/100-cars": car_move_scenario(100),
+    "car.draw/50-cars": car_draw_scenario(50),
+    "road.update": road_scenario(draw=False),
+    "road.draw": road_scenario(draw=True),
+    "particles.update/2000": particle_scenario(2000, draw=False),
+    "particles.draw/2000": particle_scenario(2000, draw=True),
+    "draw/menu": draw_scenario(GameState.MENU),
+    "draw/playing": draw_scenario(GameState.PLAYING),
+    "draw/paused": draw_scenario(GameState.PAUSED),
+    "draw/game-over": draw_scenario(GameState.GAME_OVER),
+}
+
+# Dense traffic on the stress-mode highway, for the scaling check
+STRESS_CARS = (50, 100, 200, 400)
+for cars in STRESS_CARS:
+    SCENARIOS[f"stress/{cars}-cars"] = update_scenario(cars, geometry=STRESS_ROAD)
+
+def scaling_exponent(results):
+    # Least-squares slope of log(frame time) against log(car count): 1.0 is linear, 2.0 quadratic
+    points = [(math.log(cars), math.log(results[f"stress/{cars}-cars"]["mean_ms"]))
+              for cars in STRESS_CARS if f"stress/{cars}-cars" in results]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in points) /
+            sum((x - mean_x) ** 2 for x, _ in points))
+
+# Steady-state memory budgets per frame for --memcheck. The target is no per-frame surfaces and
+# no growth; the surface budget leaves room for the odd sprite cache fill, but not for a surface
+# created every frame.
+ALLOC_BUDGET_KB = 8.0
+BLOCK_BUDGET = 1.0
+SURFACE_BUDGET = 0.1
+MEMCHECK_FRAMES = 1200
+MEMCHECK_WARMUP = 1800
+
+def percentile(sorted_times, fraction):
+    index = min(len(sorted_times) - 1, int(round(fraction * (len(sorted_times) - 1))))
+    return sorted_times[index]
+
+def run_scenario(build, seed, frames, warmup):
+    game, prepare, frame = build(seed)
+    times = []
+    for i in range(warmup + frames):
+        prepare()
+        start = time.perf_counter()
+        frame()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            times.append(elapsed * 1000)
+
+    times.sort()
+    return {
+        "frames": frames,
+        "mean_ms": sum(times) / len(times),
+        "p50_ms": percentile(times, 0.50),
+        "p95_ms": percentile(times, 0.95),
+        "p99_ms": percentile(times, 0.99),
+        "max_ms": times[-1],
+    }
+
+def memcheck(seed, frames, warmup):
+    # Steady-state play under memory instrumentation: the dodge policy drives (outside the
+    # measured frame), crashes never end the run, and every frame is simulated and drawn
+    game = make_game(seed)
+    game.lives = 3
+    profiler = game.profiler
+
+    def frame():
+        # The HUD draws one heart per life, so lives are topped up instead of unlimited
+        if game.lives == 1:
+            game.lives = 3
+        inputs = dodge_policy(game)
+        profiler.begin_frame()
+        game.step(inputs)
+        game.draw()
+        profiler.end_frame()
+
+    for _ in range(warmup):
+        frame()
+    # Every measured frame stays in the profiler's buffer and counts towards the budgets
+    game.memory.enable(frames)
+    try:
+        for _ in range(frames):
+            frame()
+        return game.memory.summary(), game.memory.report(game.memory_roots())
+    finally:
+        game.memory.disable()
+
+def check_budgets(summary, budgets):
+    # Names of the per-frame budgets the run exceeded
+    per_frame = summary["per_frame"]
+    return [name for name, limit in budgets.items() if per_frame[name] > limit]
+
+def compare(results, baseline, tolerance):
+    # A scenario regresses when its mean frame time grows past the tolerance
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        ratio = result["mean_ms"] / max(before["mean_ms"], 1e-9)
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{name:32} {before['mean_ms']:9.3f} -> {result['mean_ms']:9.3f} ms  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame hot paths of atari.py")
+    parser.add_argument("--frames", type=int, default=None,
+                        help=f"timed frames per scenario (default 300, {MEMCHECK_FRAMES} with --memcheck)")
+    parser.add_argument("--warmup", type=int, default=None,
+                        help=f"untimed frames before timing (default 30, {MEMCHECK_WARMUP} with --memcheck)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for every scenario")
+    parser.add_argument("--filter", default="", help="only run scenarios containing this text")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed mean slowdown before a scenario counts as a regression")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--max-exponent", type=float, default=1.3,
+                        help="fail when stress frame time grows faster than cars ** this")
+    parser.add_argument("--memcheck", action="store_true",
+                        help="check steady-state gameplay against the allocation budgets instead of timing")
+    parser.add_argument("--alloc-budget", type=float, default=ALLOC_BUDGET_KB,
+                        help="allowed traced allocation per frame, in KB")
+    parser.add_argument("--block-budget", type=float, default=BLOCK_BUDGET,
+                        help="allowed growth in live memory blocks per frame")
+    parser.add_argument("--surface-budget", type=float, default=SURFACE_BUDGET,
+                        help="allowed surfaces created per frame")
+    args = parser.parse_args(argv)
+
+    if args.memcheck:
+        frames = args.frames or MEMCHECK_FRAMES
+        warmup = MEMCHECK_WARMUP if args.warmup is None else args.warmup
+        summary, report = memcheck(args.seed, frames, warmup)
+        print(report)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(summary, f, indent=2)
+        over = check_budgets(summary, {"alloc_kb": args.alloc_budget, "net_blocks": args.block_budget,
+                                       "surfaces": args.surface_budget})
+        for name in over:
+            print(f"OVER BUDGET: {name} {summary['per_frame'][name]:.3f} per frame")
+        return 1 if over else 0
+
+    names = [name for name in SCENARIOS if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    frames = args.frames or 300
+    warmup = 30 if args.warmup is None else args.warmup
+    results = {}
+    print(f"{'scenario':32} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for name in names:
+        result = run_scenario(SCENARIOS[name], args.seed, frames, warmup)
+        results[name] = result
+        print(f"{name:32} {result['mean_ms']:9.3f} {result['p50_ms']:9.3f} "
+              f"{result['p95_ms']:9.3f} {result['p99_ms']:9.3f}")
+
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "frames": frames,
+            "python": platform.python_version(),
+            "pygame": pg.version.ver,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    exponent = scaling_exponent(results)
+    if exponent is not None:
+        report["scaling_exponent"] = exponent
+        print(f"\nStress scaling: frame time ~ cars ^ {exponent:.2f} (limit {args.max_exponent})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, args.tolerance):
+            return 1
+    if exponent is not None and exponent > args.max_exponent:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import os
+
+# Exports render offscreen, without a window or audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import multiprocessing as mp
+import shutil
+import subprocess
+import sys
+import time
+from itertools import islice
+
+import pygame as pg
+
+from atari import FPS, Game, GameState, HEIGHT, Replay, WIDTH
+
+# Exported frame i shows the game after i + 1 simulation ticks, so a replay of N ticks gives N frames
+
+def split_frames(start, end, chunks):
+    # [start, end) as contiguous ranges of near-equal length
+    count = end - start
+    chunks = max(1, min(chunks, count))
+    bounds = [start + count * i // chunks for i in range(chunks + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def chunk_path(work_dir, index):
+    return os.path.join(work_dir, f"chunk_{index:04d}.rgb")
+
+# printf-style, so the same name is ffmpeg's image2 input pattern
+FRAME_NAME = "frame_%06d.png"
+
+def frame_path(work_dir, frame=None):
+    # One frame's file, or with no frame the pattern matching them all
+    return os.path.join(work_dir, FRAME_NAME if frame is None else FRAME_NAME % frame)
+
+def render_chunk(job):
+    # Worker: restore the state at the chunk start by re-simulating without drawing, then draw
+    # each frame of the chunk through Game.draw into the game's offscreen surface
+    replay_path, index, start, end, fmt, work_dir, size = job
+    replay = Replay.load(replay_path)
+    game = Game(headless=True, seed=replay.seed, geometry=replay.geometry, traffic=replay.traffic)
+    game.state = GameState.PLAYING
+    inputs = replay.inputs()
+    for bits in islice(inputs, start):
+        game.step(bits)
+
+    scaled = pg.Surface(size) if size != (WIDTH, HEIGHT) else None
+    out = open(chunk_path(work_dir, index), "wb") if fmt == "raw" else None
+    try:
+        for frame, bits in zip(range(start, end), inputs):
+            game.step(bits)
+            game.draw()
+            surface = game.screen
+            if scaled:
+                surface = pg.transform.smoothscale(surface, size, scaled)
+            if out:
+                out.write(pg.image.tobytes(surface, "RGB"))
+            else:
+                pg.image.save(surface, frame_path(work_dir, frame))
+    finally:
+        if out:
+            out.close()
+    return index, end - start
+
+def concatenate(work_dir, chunks, output):
+    # Chunk files in frame order into one raw RGB stream
+    with open(output, "wb") as f:
+        for index in range(chunks):
+            path = chunk_path(work_dir, index)
+            with open(path, "rb") as chunk:
+                shutil.copyfileobj(chunk, f, 1 << 20)
+            os.remove(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a recorded replay to video frames offline")
+    parser.add_argument("replay", help="replay file recorded with atari.py --record")
+    parser.add_argument("output", help="raw RGB file (--format raw) or directory of PNGs (--format png)")
+    parser.add_argument("--format", choices=["raw", "png"], default="raw", help="frame output format")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--chunks-per-worker", type=int, default=4,
+                        help="chunks per worker, so faster workers pick up more of the run")
+    parser.add_argument("--start", type=int, default=0, help="first frame to export")
+    parser.add_argument("--end", type=int, default=None, help="frame to stop before (default: end of run)")
+    parser.add_argument("--scale", type=float, default=1.0, help="output size relative to the window")
+    parser.add_argument("--encode", metavar="VIDEO", help="encode the raw frames with ffmpeg, e.g. clip.mp4")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.replay)
+    end = replay.frames if args.end is None else min(args.end, replay.frames)
+    start = max(0, min(args.start, end))
+    if start == end:
+        print("Nothing to export")
+        return 1
+    if args.encode and args.format != "raw":
+        parser.error("--encode needs --format raw")
+    size = (round(WIDTH * args.scale) // 2 * 2, round(HEIGHT * args.scale) // 2 * 2)
+
+    if args.format == "raw":
+        work_dir = args.output + ".chunks"
+    else:
+        work_dir = args.output
+    os.makedirs(work_dir, exist_ok=True)
+
+    ranges = split_frames(start, end, args.workers * args.chunks_per_worker)
+    jobs = [(args.replay, i, a, b, args.format, work_dir, size) for i, (a, b) in enumerate(ranges)]
+    begin = time.perf_counter()
+    done = 0
+    with mp.Pool(min(args.workers, len(jobs))) as pool:
+        for _, frames in pool.imap_unordered(render_chunk, jobs):
+            done += frames
+            print(f"\r{done}/{end - start} frames", end="", flush=True)
+    print()
+
+    if args.format == "raw":
+        concatenate(work_dir, len(jobs), args.output)
+        os.rmdir(work_dir)
+    elapsed = time.perf_counter() - begin
+    print(f"Exported {end - start} frames ({(end - start) / FPS:.1f}s of play) at {size[0]}x{size[1]} "
+          f"in {elapsed:.2f}s with {args.workers} workers - {(end - start) / elapsed:.0f} frames/s")
+
+    if args.format == "raw":
+        command = ["ffmpeg", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}",
+                   "-r", str(FPS), "-i", args.output, "-pix_fmt", "yuv420p"]
+    else:
+        command = ["ffmpeg", "-y", "-framerate", str(FPS), "-start_number", str(start),
+                   "-i", frame_path(args.output), "-pix_fmt", "yuv420p"]
+    if args.encode:
+        if not shutil.which("ffmpeg"):
+            print("ffmpeg not found; encode with:")
+            print(" ".join(command + [args.encode]))
+            return 1
+        return subprocess.call(command + [args.encode])
+    print("Encode with: " + " ".join(command + ["clip.mp4"]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import os
+
+# The environments never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import multiprocessing as mp
+import time
+from bisect import bisect_left
+
+import numpy as np
+import pygame as pg
+
+from atari import (BLUE, DEFAULT_ROAD, Game, GameState, HEIGHT, INPUT_LEFT, INPUT_RIGHT, ROAD_COLOR,
+                   SHOULDER_COLOR, STRESS_ROAD, WHITE, WIDTH)
+
+# Discrete actions: keep going, steer left, steer right
+ACTIONS = (0, INPUT_LEFT, INPUT_RIGHT)
+MAX_TRAFFIC_SPEED = 10
+
+# Observation layout: player x, player velocity, then per lane (distance, speed)
+def observation_size(lanes):
+    return 2 + 2 * lanes
+
+# Simplified low-resolution scene for vision agents: road, lane stripes and flat car rects, no HUD.
+# Frames are drawn into a small preallocated surface and exposed through a surfarray view without copying.
+class PixelRenderer:
+    # Gray levels used in grayscale mode (an 8-bit surface with a gray palette)
+    GRAY = {"shoulder": 70, "road": 35, "stripe": 255, "car": 150, "player": 210}
+
+    def __init__(self, size=(84, 84), grayscale=True, stack=4):
+        self.width, self.height = size
+        self.grayscale = grayscale
+        if grayscale:
+            self.surface = pg.Surface(size, depth=8)
+            self.surface.set_palette([(i, i, i) for i in range(256)])
+            self.colors = dict(self.GRAY)
+            pixels = pg.surfarray.pixels2d(self.surface)
+        else:
+            self.surface = pg.Surface(size, depth=24)
+            self.colors = {"shoulder": SHOULDER_COLOR, "road": ROAD_COLOR, "stripe": WHITE,
+                           "car": None, "player": BLUE}
+            pixels = pg.surfarray.pixels3d(self.surface)
+        # surfarray views are indexed (x, y); agents get (y, x) without a copy
+        self.frame = pixels.swapaxes(0, 1)
+
+        self.scale_x = self.width / WIDTH
+        self.scale_y = self.height / HEIGHT
+        self.stack = np.zeros((stack,) + self.frame.shape, np.uint8)
+        self.head = 0
+
+    def rect(self, x, y, width, height):
+        return (int(x * self.scale_x), int(y * self.scale_y),
+                max(1, int(width * self.scale_x)), max(1, int(height * self.scale_y)))
+
+    def render(self, game):
+        surface = self.surface
+        colors = self.colors
+        road = game.road
+        surface.fill(colors["shoulder"])
+        geometry = game.geometry
+        surface.fill(colors["road"], self.rect(geometry.left, 0, geometry.width, HEIGHT))
+
+        # Lane stripes follow the road scroll so motion is visible between frames
+        half = min(25, geometry.lane_width // 6)
+        for lane in range(1, geometry.lanes):
+            stripe_x = geometry.left + lane * geometry.lane_width - half
+            for y in range(road.scroll - road.stripe_period, HEIGHT, road.stripe_period):
+                surface.fill(colors["stripe"], self.rect(stripe_x, y, 2 * half, road.stripe_height))
+
+        for car in game.obstacles:
+            surface.fill(colors["car"] or car.color, self.rect(car.x, car.y, car.width, car.height))
+        player = game.player
+        surface.fill(colors["player"], self.rect(player.x, player.y, player.width, player.height))
+        return self.frame
+
+    def push(self):
+        self.stack[self.head] = self.frame
+        self.head = (self.head + 1) % len(self.stack)
+
+    def reset_stack(self):
+        self.stack[:] = self.frame
+        self.head = 0
+
+    def stacked(self, out=None):
+        # Frames oldest first
+        order = (self.head + np.arange(len(self.stack))) % len(self.stack)
+        if out is None:
+            return self.stack[order]
+        np.take(self.stack, order, axis=0, out=out)
+        return out
+
+# Gym-style environment over one headless game
+class RacerEnv:
+    def __init__(self, max_frames=10000, crash_penalty=5.0, pixels=False,
+                 frame_size=(84, 84), grayscale=True, frame_stack=4, geometry=DEFAULT_ROAD, traffic=0):
+        self.max_frames = max_frames
+        self.crash_penalty = crash_penalty
+        self.game = Game(headless=True, seed=0, geometry=geometry, traffic=traffic)
+        self.lanes = geometry.lanes
+        if pixels:
+            self.renderer = PixelRenderer(frame_size, grayscale, frame_stack)
+            self.observation = np.zeros(self.renderer.stack.shape, np.uint8)
+        else:
+            self.renderer = None
+            self.observation = np.zeros(observation_size(self.lanes), np.float32)
+
+    @property
+    def observation_shape(self):
+        return self.observation.shape
+
+    def reset(self, seed=None):
+        self.game.start_run(seed)
+        self.game.state = GameState.PLAYING
+        if self.renderer:
+            self.renderer.render(self.game)
+            self.renderer.reset_stack()
+        return self.observe(), self.info()
+
+    def step(self, action):
+        game = self.game
+        score, lives = game.score, game.lives
+        game.step(ACTIONS[action])
+        if self.renderer:
+            self.renderer.render(game)
+            self.renderer.push()
+
+        reward = (game.score - score) - self.crash_penalty * (lives - game.lives)
+        terminated = game.state == GameState.GAME_OVER
+        truncated = not terminated and game.frame >= self.max_frames
+        return self.observe(), float(reward), terminated, truncated, self.info()
+
+    def observe(self, out=None):
+        obs = self.observation if out is None else out
+        if self.renderer:
+            return self.renderer.stacked(obs)
+
+        game = self.game
+        player = game.player
+
+        road_span = player.road_right - player.width - player.road_left
+        obs[0] = (player.x - player.road_left) / road_span
+        obs[1] = player.velocity_x / player.max_speed
+
+        # Nearest car ahead of (or alongside) the player in each lane
+        index = game.lane_index
+        limit = player.y + player.height
+        for lane in range(self.lanes):
+            ys = index.ys[lane]
+            i = bisect_left(ys, limit) - 1
+            if i >= 0:
+                car = index.cars[lane][i]
+                obs[2 + 2 * lane] = max(0.0, player.y - (car.y + car.height)) / HEIGHT
+                obs[3 + 2 * lane] = car.speed / MAX_TRAFFIC_SPEED
+            else:
+                obs[2 + 2 * lane] = 1.0
+                obs[3 + 2 * lane] = 0.0
+        return obs
+
+    def info(self):
+        game = self.game
+        return {"score": game.score, "lives": game.lives, "frame": game.frame, "seed": game.seed}
+
+# K environments stepped in lockstep in this process, resetting automatically when a game ends
+class VecRacerEnv:
+    def __init__(self, count, seed=0, **env_kwargs):
+        self.envs = [RacerEnv(**env_kwargs) for _ in range(count)]
+        self.next_seed = seed
+        sample = self.envs[0].observation
+        self.observations = np.zeros((count,) + sample.shape, sample.dtype)
+        self.rewards = np.zeros(count, np.float32)
+        self.terminated = np.zeros(count, bool)
+        self.truncated = np.zeros(count, bool)
+
+    def __len__(self):
+        return len(self.envs)
+
+    def take_seed(self):
+        seed = self.next_seed
+        self.next_seed += 1
+        return seed
+
+    def reset(self):
+        infos = []
+        for i, env in enumerate(self.envs):
+            env.reset(self.take_seed())
+            env.observe(self.observations[i])
+            infos.append(env.info())
+        return self.observations.copy(), infos
+
+    def step(self, actions):
+        infos = []
+        for i, env in enumerate(self.envs):
+            obs, reward, terminated, truncated, info = env.step(actions[i])
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            if terminated or truncated:
+                info["final_observation"] = obs.copy()
+                env.reset(self.take_seed())
+            env.observe(self.observations[i])
+            infos.append(info)
+        return (self.observations.copy(), self.rewards.copy(), self.terminated.copy(),
+                self.truncated.copy(), infos)
+
+def worker(connection, count, seed, env_kwargs):
+    envs = VecRacerEnv(count, seed, **env_kwargs)
+    while True:
+        command, data = connection.recv()
+        if command == "step":
+            connection.send(envs.step(data))
+        elif command == "reset":
+            connection.send(envs.reset())
+        elif command == "close":
+            connection.close()
+            break
+
+# The same lockstep API with the games spread over a pool of worker processes
+class SubprocVecRacerEnv:
+    def __init__(self, count, workers=None, seed=0, **env_kwargs):
+        workers = min(count, workers or os.cpu_count() or 1)
+        sizes = [count // workers + (1 if i < count % workers else 0) for i in range(workers)]
+        self.count = count
+        self.splits = np.cumsum(sizes)[:-1]
+        self.connections = []
+        self.processes = []
+
+        # Each worker gets its own block of seeds so runs never repeat across workers
+        seed_stride = 1 << 32
+        for i, size in enumerate(sizes):
+            parent, child = mp.Pipe()
+            process = mp.Process(target=worker, args=(child, size, seed + i * seed_stride, env_kwargs),
+                                 daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def __len__(self):
+        return self.count
+
+    def reset(self):
+        for connection in self.connections:
+            connection.send(("reset", None))
+        results = [connection.recv() for connection in self.connections]
+        return (np.concatenate([obs for obs, _ in results]),
+                [info for _, infos in results for info in infos])
+
+    def step(self, actions):
+        for connection, chunk in zip(self.connections, np.split(np.asarray(actions), self.splits)):
+            connection.send(("step", chunk))
+        results = [connection.recv() for connection in self.connections]
+        return (np.concatenate([r[0] for r in results]),
+                np.concatenate([r[1] for r in results]),
+                np.concatenate([r[2] for r in results]),
+                np.concatenate([r[3] for r in results]),
+                [info for r in results for info in r[4]])
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure environment throughput with random actions")
+    parser.add_argument("--envs", type=int, default=8, help="games stepped in lockstep")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 = in-process)")
+    parser.add_argument("--steps", type=int, default=2000, help="lockstep steps to run")
+    parser.add_argument("--pixels", action="store_true", help="observe stacked 84x84 grayscale frames")
+    parser.add_argument("--stress", action="store_true", help="play on the stress-mode highway")
+    args = parser.parse_args()
+
+    env_kwargs = {"pixels": args.pixels}
+    if args.stress:
+        env_kwargs.update(geometry=STRESS_ROAD, traffic=300)
+    if args.workers:
+        envs = SubprocVecRacerEnv(args.envs, args.workers, **env_kwargs)
+    else:
+        envs = VecRacerEnv(args.envs, **env_kwargs)
+    envs.reset()
+    actions = np.random.default_rng(0).integers(0, len(ACTIONS), (args.steps, args.envs))
+
+    start = time.perf_counter()
+    episodes = 0
+    for step_actions in actions:
+        _, _, terminated, truncated, _ = envs.step(step_actions)
+        episodes += int(terminated.sum() + truncated.sum())
+    elapsed = time.perf_counter() - start
+    if args.workers:
+        envs.close()
+    print(f"{args.steps * args.envs} environment steps in {elapsed:.2f}s "
+          f"- {args.steps * args.envs / elapsed:.0f} steps/s, {episodes} episodes finished")
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from atari import Game, GameState, HEIGHT, WIDTH, dodge_policy
+from export_video import FRAME_NAME, concatenate, frame_path, main, render_chunk, split_frames
+
+FRAMES = 24
+
+@pytest.fixture
+def replay_path(tmp_path):
+    game = Game(headless=True, seed=77)
+    game.state = GameState.PLAYING
+    for _ in range(FRAMES):
+        game.step(dodge_policy(game))
+    path = str(tmp_path / "run.rpl")
+    game.replay.save(path)
+    return path
+
+def export(replay_path, work_dir, chunks, start=0, end=FRAMES, size=(WIDTH, HEIGHT)):
+    # What main does with one worker per chunk, minus the process pool
+    os.makedirs(work_dir)
+    ranges = split_frames(start, end, chunks)
+    for i, (a, b) in enumerate(ranges):
+        assert render_chunk((replay_path, i, a, b, "raw", work_dir, size)) == (i, b - a)
+    output = work_dir + ".rgb"
+    concatenate(work_dir, len(ranges), output)
+    with open(output, "rb") as f:
+        return f.read()
+
+def test_split_frames_covers_range():
+    assert split_frames(3, 13, 4) == [(3, 5), (5, 8), (8, 10), (10, 13)]
+    assert split_frames(0, 2, 8) == [(0, 1), (1, 2)]
+
+@pytest.mark.parametrize("size", [(WIDTH, HEIGHT), (WIDTH // 2, HEIGHT // 2)])
+def test_chunked_export_matches_single_worker(tmp_path, replay_path, size):
+    single = export(replay_path, str(tmp_path / "one"), 1, size=size)
+    assert len(single) == FRAMES * size[0] * size[1] * 3
+    assert export(replay_path, str(tmp_path / "many"), 5, size=size) == single
+
+def test_worker_count_does_not_change_output(tmp_path, replay_path):
+    outputs = []
+    for workers in ("1", "2"):
+        output = str(tmp_path / f"workers{workers}.rgb")
+        assert main([replay_path, output, "--workers", workers, "--chunks-per-worker", "3"]) == 0
+        with open(output, "rb") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
+
+def test_partial_range_matches_full_export(tmp_path, replay_path):
+    frame = WIDTH * HEIGHT * 3
+    full = export(replay_path, str(tmp_path / "full"), 1)
+    assert export(replay_path, str(tmp_path / "part"), 3, start=7, end=19) == full[7 * frame:19 * frame]
+
+def test_png_frames_use_shared_pattern(tmp_path, replay_path):
+    render_chunk((replay_path, 0, 4, 6, "png", str(tmp_path), (WIDTH, HEIGHT)))
+    assert sorted(os.listdir(tmp_path)) == sorted(["run.rpl", FRAME_NAME % 4, FRAME_NAME % 5])
+    assert frame_path(str(tmp_path), 4) == frame_path(str(tmp_path)) % 4
@@ -0,0 +1,21 @@
+from atari import Game, GameState, HEIGHT, WIDTH, dodge_policy
+
+def run(seed, frames=600):
+    game = Game(headless=True, seed=seed)
+    game.state = GameState.PLAYING
+    for _ in range(frames):
+        if game.state != GameState.PLAYING:
+            break
+        game.step(dodge_policy(game))
+    return game
+
+def test_headless_game_steps_and_draws():
+    game = run(1, 120)
+    game.draw()
+    assert game.frame == 120
+    assert game.screen.get_size() == (WIDTH, HEIGHT)
+
+def test_same_seed_gives_same_run():
+    first, second = run(42), run(42)
+    assert (first.frame, first.score, first.player.x) == (second.frame, second.score, second.player.x)
+    assert [(car.x, car.y) for car in first.obstacles] == [(car.x, car.y) for car in second.obstacles]
@@ -0,0 +1,39 @@
+from atari import Game, GameState, STRESS_ROAD, dodge_policy
+
+def linear_first_collision(car, rect, obstacles):
+    # The scan Car.move falls back to without an index
+    for other in obstacles:
+        if other is not car and rect.colliderect(other.rect):
+            return other
+    return None
+
+def test_index_tracks_every_obstacle():
+    game = Game(headless=True, seed=3, geometry=STRESS_ROAD, traffic=300)
+    game.state = GameState.PLAYING
+    for _ in range(200):
+        game.step(dodge_policy(game))
+        game.lives = 3
+    index = game.lane_index
+    assert set(index.slots) == set(game.obstacles)
+    for lane, ys in enumerate(index.ys):
+        assert ys == sorted(ys)
+        assert all(car.get_lane() == lane for car in index.cars[lane])
+
+def test_first_collision_matches_linear_scan():
+    game = Game(headless=True, seed=5, geometry=STRESS_ROAD, traffic=300)
+    game.state = GameState.PLAYING
+    probe = game.player.rect.copy()
+    hits = 0
+    for frame in range(150):
+        game.step(dodge_policy(game))
+        game.lives = 3
+        if frame % 10:
+            continue
+        for car in game.obstacles:
+            # The look-ahead rect Car.move tests, plus a wider one reaching into neighbouring lanes
+            for dx, grow in ((0, 0), (-car.lane_width // 2, car.lane_width)):
+                probe.update(car.x + dx, car.y + car.speed, car.width + grow, car.height)
+                expected = linear_first_collision(car, probe, game.obstacles)
+                assert game.lane_index.first_collision(car, probe) is expected
+                hits += expected is not None
+    assert hits
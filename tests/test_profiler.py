@@ -0,0 +1,52 @@
+import time
+
+from atari import FrameProfiler, MemoryProfiler, new_surface
+
+def test_enabling_mid_frame_records_a_sane_first_frame():
+    profiler = FrameProfiler()
+    profiler.begin_frame()
+    profiler.enable()
+    profiler.lap("events")
+    profiler.end_frame()
+    assert profiler.frame_count == 1
+    assert 0 <= profiler.recent()[0].sum() < 100
+
+def test_time_spent_disabled_is_not_charged():
+    profiler = FrameProfiler()
+    profiler.enable()
+    profiler.begin_frame()
+    profiler.lap("events")
+    profiler.end_frame()
+    profiler.disable()
+    profiler.begin_frame()
+    time.sleep(0.2)
+    profiler.enable()
+    profiler.lap("events")
+    profiler.end_frame()
+    assert profiler.frame_count == 2
+    assert profiler.recent()[-1].sum() < 100
+
+def test_recent_keeps_the_last_frames_oldest_first():
+    profiler = FrameProfiler(frames=4)
+    profiler.enable()
+    for frame in range(6):
+        profiler.begin_frame()
+        profiler.current[0] = frame / 1000
+        profiler.end_frame()
+    assert profiler.recent()[:, 0].tolist() == [2, 3, 4, 5]
+
+def test_memory_session_starts_from_an_empty_frame():
+    memory = MemoryProfiler()
+    memory.enable()
+    memory.begin_frame()
+    new_surface((8, 8))
+    memory.lap("cars")
+    memory.disable()
+    memory.enable()
+    memory.lap("events")
+    memory.end_frame()
+    memory.disable()
+    frames, _ = memory.recent()
+    surfaces = frames[0, MemoryProfiler.METRICS.index("surfaces")]
+    assert surfaces[memory.stage_index["cars"]] == 0
+    assert surfaces.sum() == 0
@@ -0,0 +1,122 @@
+import numpy as np
+import pygame as pg
+import pytest
+
+from atari import BLUE, Car, HEIGHT, ROAD_COLOR, SHOULDER_COLOR, STRESS_ROAD, WIDTH
+from racer_env import ACTIONS, MAX_TRAFFIC_SPEED, PixelRenderer, RacerEnv, SubprocVecRacerEnv, VecRacerEnv
+
+def scan_observation(game):
+    # Nearest car ahead of or alongside the player in each lane, found by scanning every obstacle
+    player = game.player
+    limit = player.y + player.height
+    lanes = []
+    for lane in range(game.geometry.lanes):
+        cars = [car for car in game.obstacles if car.get_lane() == lane and car.y < limit]
+        if cars:
+            car = max(cars, key=lambda car: car.y)
+            lanes.append((max(0.0, player.y - (car.y + car.height)) / HEIGHT, car.speed / MAX_TRAFFIC_SPEED))
+        else:
+            lanes.append((1.0, 0.0))
+    return np.array(lanes, np.float32).ravel()
+
+def test_observation_size_follows_the_road():
+    assert RacerEnv().reset(0)[0].shape == (8,)
+    assert RacerEnv(geometry=STRESS_ROAD, traffic=300).reset(0)[0].shape == (26,)
+
+@pytest.mark.parametrize("kwargs", [{}, {"geometry": STRESS_ROAD, "traffic": 300}])
+def test_lane_entries_match_a_linear_scan(kwargs):
+    env = RacerEnv(**kwargs)
+    obs, _ = env.reset(9)
+    actions = np.random.default_rng(9).integers(0, len(ACTIONS), 400)
+    occupied = 0
+    for action in actions:
+        obs, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            obs, _ = env.reset()
+        np.testing.assert_allclose(obs[2:], scan_observation(env.game), rtol=1e-6)
+        occupied += int((obs[3::2] > 0).sum())
+    assert occupied
+
+def test_vec_env_resets_finished_games():
+    envs = VecRacerEnv(2, seed=5, max_frames=30)
+    obs, infos = envs.reset()
+    assert obs.shape == (2, 8)
+    assert [info["seed"] for info in infos] == [5, 6]
+    for _ in range(30):
+        obs, rewards, terminated, truncated, infos = envs.step([0, 0])
+    assert truncated.all() and not terminated.any()
+    for i, info in enumerate(infos):
+        assert info["final_observation"].shape == (8,)
+        assert info["frame"] == 30
+        # The returned observation already belongs to the next run
+        assert envs.envs[i].game.frame == 0
+        assert envs.envs[i].game.seed == 7 + i
+        np.testing.assert_array_equal(obs[i], envs.envs[i].observe().copy())
+
+def test_subprocess_envs_match_in_process_envs():
+    # Two workers take seed blocks 0.. and 2**32..; the same seeds in this process must agree
+    remote = SubprocVecRacerEnv(4, workers=2, seed=0, max_frames=60)
+    local = [VecRacerEnv(2, seed=0, max_frames=60), VecRacerEnv(2, seed=1 << 32, max_frames=60)]
+    try:
+        obs, infos = remote.reset()
+        results = [envs.reset() for envs in local]
+        np.testing.assert_array_equal(obs, np.concatenate([r[0] for r in results]))
+        assert [info["seed"] for info in infos] == [info["seed"] for r in results for info in r[1]]
+        for actions in np.random.default_rng(1).integers(0, len(ACTIONS), (150, 4)):
+            obs, rewards, terminated, truncated, infos = remote.step(actions)
+            expected = [local[0].step(actions[:2]), local[1].step(actions[2:])]
+            np.testing.assert_array_equal(obs, np.concatenate([r[0] for r in expected]))
+            np.testing.assert_array_equal(rewards, np.concatenate([r[1] for r in expected]))
+            np.testing.assert_array_equal(terminated, np.concatenate([r[2] for r in expected]))
+            np.testing.assert_array_equal(truncated, np.concatenate([r[3] for r in expected]))
+    finally:
+        remote.close()
+
+def test_renderer_frame_is_a_view_of_the_surface():
+    for grayscale, pixels in ((True, pg.surfarray.pixels2d), (False, pg.surfarray.pixels3d)):
+        renderer = PixelRenderer(grayscale=grayscale)
+        view = pixels(renderer.surface)
+        assert np.shares_memory(renderer.frame, view)
+        del view
+        env = RacerEnv()
+        env.reset(0)
+        assert renderer.render(env.game) is renderer.frame
+
+def test_stack_is_oldest_first():
+    renderer = PixelRenderer(stack=4)
+    renderer.frame[:] = 9
+    renderer.reset_stack()
+    assert renderer.stacked()[:, 0, 0].tolist() == [9, 9, 9, 9]
+    for value in range(6):
+        renderer.frame[:] = value
+        renderer.push()
+    assert renderer.stacked()[:, 0, 0].tolist() == [2, 3, 4, 5]
+    out = np.zeros_like(renderer.stack)
+    assert renderer.stacked(out) is out
+    assert out[:, -1, -1].tolist() == [2, 3, 4, 5]
+
+@pytest.mark.parametrize("grayscale", [True, False])
+def test_renderer_colors(grayscale):
+    env = RacerEnv()
+    env.reset(0)
+    game = env.game
+    geometry = game.geometry
+    car = Car(geometry.lane_center(0) - 22, 100, (200, 30, 90), rng=game.rng, road=geometry)
+    game.obstacles = [car]
+    renderer = PixelRenderer(size=(WIDTH // 5, HEIGHT // 5), grayscale=grayscale)
+    frame = renderer.render(game)
+
+    def pixel(x, y):
+        # Frame pixel under a point in window coordinates
+        return frame[int(y * renderer.scale_y), int(x * renderer.scale_x)].tolist()
+
+    if grayscale:
+        colors = {name: renderer.GRAY[name] for name in ("shoulder", "road", "car", "player")}
+    else:
+        colors = {"shoulder": list(SHOULDER_COLOR), "road": list(ROAD_COLOR), "car": list(car.color),
+                  "player": list(BLUE)}
+    player = game.player
+    assert pixel(5, HEIGHT // 2) == colors["shoulder"]
+    assert pixel(geometry.lane_center(geometry.lanes - 1), HEIGHT // 2) == colors["road"]
+    assert pixel(car.x + car.width // 2, car.y + car.height // 2) == colors["car"]
+    assert pixel(player.x + player.width // 2, player.y + player.height // 2) == colors["player"]
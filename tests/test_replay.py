@@ -0,0 +1,62 @@
+import argparse
+import random
+
+import pytest
+
+from atari import (Game, GameState, INPUT_LEFT, INPUT_RIGHT, MAX_SEED, Replay, STRESS_ROAD, dodge_policy,
+                   seed_arg)
+
+def play(seed, frames=3000, **kwargs):
+    # Mostly sensible driving with random inputs mixed in, so runs of every length get recorded
+    noise = random.Random(seed)
+    game = Game(headless=True, seed=seed, **kwargs)
+    game.state = GameState.PLAYING
+    inputs = []
+    while game.state == GameState.PLAYING and game.frame < frames:
+        bits = dodge_policy(game) if noise.random() < 0.7 else noise.choice([0, INPUT_LEFT, INPUT_RIGHT])
+        inputs.append(bits)
+        game.step(bits)
+    return game, inputs
+
+def test_rle_round_trip(tmp_path):
+    game, inputs = play(11, frames=1500)
+    path = str(tmp_path / "run.rpl")
+    game.replay.save(path)
+    loaded = Replay.load(path)
+    assert list(loaded.inputs()) == inputs
+    assert (loaded.seed, loaded.frames, loaded.runs) == (11, len(inputs), game.replay.runs)
+
+def test_long_runs_split_at_the_length_limit():
+    replay = Replay(1)
+    for _ in range(0x10000 + 5):
+        replay.record(INPUT_LEFT)
+    assert [length for _, length in replay.runs] == [0xFFFF, 6]
+    assert replay.frames == 0x10000 + 5
+
+def test_load_rejects_truncated_file(tmp_path):
+    game, _ = play(2, frames=300)
+    path = tmp_path / "run.rpl"
+    game.replay.save(str(path))
+    path.write_bytes(path.read_bytes()[:-Replay.RUN.size])
+    with pytest.raises(ValueError):
+        Replay.load(str(path))
+
+@pytest.mark.parametrize("seed, kwargs", [(1234, {}), (2 ** 62 + 7, {}),
+                                          (99, {"geometry": STRESS_ROAD, "traffic": 120})])
+def test_replay_is_bit_exact(tmp_path, seed, kwargs):
+    game, _ = play(seed, **kwargs)
+    game.replay.final_score = game.score
+    path = str(tmp_path / "run.rpl")
+    game.replay.save(path)
+    replayed = Replay.load(path).play()
+    assert (replayed.frame, replayed.score, replayed.lives) == (game.frame, game.score, game.lives)
+    assert replayed.player.x == game.player.x
+    assert [(car.x, car.y, car.speed) for car in replayed.obstacles] == \
+        [(car.x, car.y, car.speed) for car in game.obstacles]
+
+def test_seed_arg_range():
+    assert seed_arg("0") == 0
+    assert seed_arg(str(MAX_SEED - 1)) == MAX_SEED - 1
+    for text in ["-1", str(MAX_SEED), "abc"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            seed_arg(text)
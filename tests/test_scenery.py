@@ -0,0 +1,73 @@
+import math
+import random
+
+import pygame as pg
+
+from atari import (BASE_SPEED, DEFAULT_ROAD, HEIGHT, Road, SCENERY_CHUNK, SCENERY_PREFETCH, STRESS_ROAD, WIDTH,
+                   quality)
+
+def layout(chunk):
+    return [(obj.x, obj.y, obj.type, obj.color, obj.sprite) for obj in chunk]
+
+def test_chunk_depends_only_on_seed_and_index():
+    road = Road(random.Random(1))
+    other = Road(random.Random(2))
+    other.seed = road.seed
+    for index in (0, 1, 7, 500):
+        expected = layout(road.generate_chunk(index))
+        assert layout(road.generate_chunk(index)) == expected
+        assert layout(other.generate_chunk(index)) == expected
+    assert all(SCENERY_CHUNK * 7 <= obj.y < SCENERY_CHUNK * 8 for obj in road.generate_chunk(7))
+
+def test_chunks_differ_between_seeds():
+    first, second = Road(random.Random(1)), Road(random.Random(2))
+    assert first.seed != second.seed
+    assert [layout(first.generate_chunk(i)) for i in range(8)] != \
+        [layout(second.generate_chunk(i)) for i in range(8)]
+
+def test_streaming_is_bounded_and_regenerates_identically():
+    road = Road(random.Random(3))
+    seen = {index: layout(chunk) for index, chunk in road.chunks.items()}
+    counts = []
+    for distance in range(0, SCENERY_CHUNK * 40, 37):
+        road.distance = distance
+        road.stream()
+        counts.append(len(road.chunks))
+        # The resident chunks cover the screen
+        assert min(road.chunks) * SCENERY_CHUNK <= distance
+        assert (max(road.chunks) + 1) * SCENERY_CHUNK > distance + HEIGHT
+        for index, chunk in road.chunks.items():
+            assert seen.setdefault(index, layout(chunk)) == layout(chunk)
+    assert max(counts) <= (HEIGHT + 2 * SCENERY_PREFETCH) // SCENERY_CHUNK + 2
+    assert len(seen) > max(counts)
+
+def test_reset_reseeds_from_rng():
+    rng = random.Random(4)
+    road = Road(rng)
+    first = layout(road.generate_chunk(0))
+    road.reset(random.Random(4))
+    assert layout(road.generate_chunk(0)) == first
+    road.reset(rng)
+    assert road.distance == 0 and 0 in road.chunks
+
+def test_scenery_stays_on_the_shoulders():
+    for geometry in (DEFAULT_ROAD, STRESS_ROAD):
+        road = Road(random.Random(5), geometry)
+        for index in range(20):
+            for obj in road.generate_chunk(index):
+                assert not geometry.left <= obj.x <= geometry.left + geometry.width
+
+def test_sprites_round_down_across_the_top_edge():
+    road = Road(random.Random(6))
+    screen = pg.Surface((WIDTH, HEIGHT))
+    road.draw(screen)
+    obj = road.chunks[0][0]
+    road.chunks = {0: [obj]}
+    area, dx, dy = road.atlas_cells[quality.tier["scenery_detail"]][obj.sprite]
+    for shift in range(-2, 8):
+        road.distance = obj.y - HEIGHT + shift
+        for alpha in (0.0, 0.25, 0.5, 0.75, 1.0):
+            # Between ticks the object sits a fraction of a step back, around the top edge
+            road.draw(screen, alpha)
+            y = math.floor(shift - BASE_SPEED * (1.0 - alpha))
+            assert road.batch[2] == (road.atlas, (obj.x + dx, y + dy), area)
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from atari import ScoreService
+
+@pytest.fixture
+def service(tmp_path):
+    service = ScoreService(path=str(tmp_path / "highscore.txt"), db_path=None)
+    yield service
+    service.close()
+
+def test_high_score_is_written_atomically(tmp_path, service):
+    for score in (10, 5, 30):
+        service.submit(score, 1)
+    service.flush()
+    assert (tmp_path / "highscore.txt").read_text() == "30"
+    assert os.listdir(tmp_path) == ["highscore.txt"]
+    assert ScoreService(path=service.path, db_path=None).high_score == 30
+
+def test_failed_swap_keeps_the_old_file(tmp_path, service, monkeypatch):
+    service.submit(10, 1)
+    service.flush()
+
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "replace", fail)
+    service.submit(20, 1)
+    service.flush()
+    assert (tmp_path / "highscore.txt").read_text() == "10"
+
+    # The writer survives the failure and saves later scores
+    monkeypatch.undo()
+    service.submit(40, 1)
+    service.flush()
+    assert (tmp_path / "highscore.txt").read_text() == "40"
+
+def test_leaderboard_records_scores(tmp_path):
+    service = ScoreService(path=None, db_path=str(tmp_path / "leaderboard.db"))
+    for score, seed in ((5, 1), (50, 2), (20, 1)):
+        service.submit(score, 1, seed)
+    service.close()
+    assert [row[0] for row in service.top()] == [50, 20, 5]
+    assert [row[0] for row in service.top_for_seed(1)] == [20, 5]
+
+def test_headless_service_touches_no_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = ScoreService(path=None, db_path=None)
+    service.submit(100, 1)
+    service.flush()
+    assert service.high_score == 100 and service.thread is None
+    assert os.listdir(tmp_path) == []